@@ -0,0 +1,75 @@
+"""Latencia de verificación de bcrypt según el coste, para elegir BCRYPT_ROUNDS.
+
+Uso: python -m benchmarks.bcrypt_cost [--rounds 8-14] [--samples 20] [--target-p99-ms 300]
+     [--output r.json]
+
+Mide verify en un solo núcleo (lo que tarda un proceso del pool de hashing) y sugiere
+el coste más alto cuyo p99 queda por debajo del objetivo. La latencia de login bajo
+carga suma la espera en la cola: ver password_hash_duration_seconds en /metrics.
+"""
+import argparse
+import json
+import sys
+import time
+
+from passlib.context import CryptContext
+
+from benchmarks.common import percentile
+
+PASSWORD = "benchmark-password"
+
+
+def measure(rounds: int, samples: int) -> dict:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+    hashed = context.hash(PASSWORD)
+    context.verify(PASSWORD, hashed)  # calentamiento
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify(PASSWORD, hashed)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "rounds": rounds,
+        "samples": samples,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "verifies_per_second_per_core": round(samples / sum(latencies), 2),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", default="8-14", help="Rango de costes, p. ej. 10-13")
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--target-p99-ms", type=float, default=300.0)
+    parser.add_argument("--output", help="Ruta del JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    low, _, high = args.rounds.partition("-")
+    results = []
+    print(f"{'rounds':>6}{'p50 ms':>10}{'p99 ms':>10}{'verify/s/core':>15}")
+    for rounds in range(int(low), int(high or low) + 1):
+        result = measure(rounds, args.samples)
+        results.append(result)
+        print(f"{rounds:>6}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              f"{result['verifies_per_second_per_core']:>15.2f}")
+
+    candidates = [r["rounds"] for r in results if r["p99_ms"] <= args.target_p99_ms]
+    recommended = max(candidates) if candidates else None
+    if recommended is None:
+        print(f"\nNingún coste cumple p99 <= {args.target_p99_ms} ms")
+    else:
+        print(f"\nBCRYPT_ROUNDS recomendado para p99 <= {args.target_p99_ms} ms: {recommended}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "target_p99_ms": args.target_p99_ms,
+                "recommended_rounds": recommended,
+                "results": results,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+import os
+import secrets
+import tempfile
+
+# Utilidades compartidas por los benchmarks. Deben usarse antes de importar `src`,
+# porque la configuración se lee al importar src.config.
+
+# JWT_SECRET_KEY es obligatoria: una aleatoria por ejecución si no viene del entorno
+os.environ.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(32))
+
+
+def use_temp_database(prefix: str = "tienda-bench-") -> str:
+    directory = tempfile.mkdtemp(prefix=prefix)
+    path = os.path.join(directory, "tienda.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return path
+
+
+def migrate():
+    from src.manage import main
+    main(["migrate"])
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
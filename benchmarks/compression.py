@@ -0,0 +1,131 @@
+"""Compresión de listados de productos: CPU gastada frente a bytes ahorrados.
+
+Uso: python -m benchmarks.compression [--sizes 10,50,200,500,2000] [--mbps 2]
+                                      [--gzip-levels 1,6,9] [--brotli-qualities 1,4,6,11]
+                                      [--output r.json]
+
+Serializa páginas de ProductoPage como lo hace el listado y las comprime con el mismo
+compresor que CompressionMiddleware. Para cada codificación muestra el tamaño, el
+tiempo de CPU por respuesta y el tiempo de transferencia ahorrado con un enlace
+móvil de --mbps megabits por segundo. La fila "ndjson" comprime el streaming de 2000
+productos en lotes de PRODUCTOS_STREAM_BATCH_SIZE con un vaciado por lote.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.common import use_temp_database
+
+use_temp_database("tienda-compresion-")
+
+from src.config import settings  # noqa: E402
+from src.features.usuarios import models as usuarios_models  # noqa: E402,F401
+from src.features.productos import models, schemas  # noqa: E402
+from src.shared.compression import brotli, make_compressor  # noqa: E402
+from src.shared.responses import pydantic_response  # noqa: E402
+
+WORDS = [
+    "mesa", "silla", "lampara", "sofa", "cama", "armario", "estante", "cojin", "alfombra",
+    "espejo", "madera", "metal", "vidrio", "roble", "pino", "blanco", "negro", "rojo", "azul",
+    "verde", "grande", "pequeño", "moderno", "clasico", "jardin", "cocina", "oficina", "baño",
+]
+
+
+def build_productos(n: int) -> list:
+    rng = random.Random(n)
+    now = datetime.utcnow()
+    return [
+        models.Producto(
+            id=i + 1, nombre=" ".join(rng.choices(WORDS, k=3)),
+            descripcion=" ".join(rng.choices(WORDS, k=12)),
+            precio=round(rng.uniform(1, 1000), 2), stock=rng.randint(0, 40), usuario_id=1,
+            fecha_creacion=now, fecha_actualizacion=now, activo=True
+        )
+        for i in range(n)
+    ]
+
+
+def page_body(n: int) -> bytes:
+    productos = build_productos(n)
+    return pydantic_response(schemas.ProductoPage, {"items": productos, "next_cursor": None}).body
+
+
+def ndjson_chunks(n: int, batch_size: int) -> list:
+    productos = build_productos(n)
+    return [
+        "".join(
+            schemas.Producto.model_validate(producto).model_dump_json() + "\n"
+            for producto in productos[first:first + batch_size]
+        ).encode()
+        for first in range(0, n, batch_size)
+    ]
+
+
+def compress_chunks(chunks: list, encoding: str, level: int) -> int:
+    compress = make_compressor(encoding, gzip_level=level, brotli_quality=level)
+    size = 0
+    for index, chunk in enumerate(chunks):
+        size += len(compress(chunk, index == len(chunks) - 1))
+    return size
+
+
+def measure(chunks: list, encoding: str, level: int, min_seconds: float = 0.3):
+    size = compress_chunks(chunks, encoding, level)  # calentamiento
+    runs = 0
+    start = time.process_time()
+    while True:
+        compress_chunks(chunks, encoding, level)
+        runs += 1
+        elapsed = time.process_time() - start
+        if elapsed >= min_seconds:
+            return size, elapsed / runs
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,50,200,500,2000")
+    parser.add_argument("--mbps", type=float, default=2.0, help="Ancho de banda del cliente")
+    parser.add_argument("--gzip-levels", default="1,6,9")
+    parser.add_argument("--brotli-qualities", default="1,4,6,11")
+    parser.add_argument("--output", help="Ruta del JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    encodings = [("gzip", int(level)) for level in args.gzip_levels.split(",")]
+    if brotli is not None:
+        encodings += [("br", int(quality)) for quality in args.brotli_qualities.split(",")]
+    else:
+        print("brotli no está instalado: solo se mide gzip")
+
+    cases = [(f"pagina {n}", [page_body(n)]) for n in (int(size) for size in args.sizes.split(","))]
+    cases.append(("ndjson 2000", ndjson_chunks(2000, settings.PRODUCTOS_STREAM_BATCH_SIZE)))
+
+    bytes_per_ms = args.mbps * 1_000_000 / 8 / 1000
+    results = []
+    print(f"{'caso':<14}{'codificación':<12}{'bytes':>10}{'ratio':>8}{'cpu':>11}{'ahorro red':>13}")
+    for name, chunks in cases:
+        original = sum(len(chunk) for chunk in chunks)
+        print(f"{name:<14}{'identity':<12}{original:>10}{1:>8.2f}{0:>8.3f} ms{0:>10.1f} ms")
+        for encoding, level in encodings:
+            size, cpu = measure(chunks, encoding, level)
+            saved_ms = (original - size) / bytes_per_ms
+            row = {
+                "case": name, "encoding": encoding, "level": level, "bytes": original,
+                "compressed_bytes": size, "ratio": round(original / size, 2),
+                "cpu_ms": round(cpu * 1000, 3), "transfer_saved_ms": round(saved_ms, 1),
+            }
+            results.append(row)
+            label = f"{encoding}-{level}"
+            print(f"{'':<14}{label:<12}{size:>10}{row['ratio']:>8.2f}"
+                  f"{row['cpu_ms']:>8.3f} ms{row['transfer_saved_ms']:>10.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"mbps": args.mbps, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Altas de productos: commit por petición frente a group commit.
+
+Uso: python -m benchmarks.group_commit [--mode gunicorn|uvicorn|inprocess] [--concurrency 64]
+     [--duration 10] [--synchronous NORMAL] [--max-delay-ms 5] [--max-rows 100] [--output r.json]
+
+Lanza benchmarks.load con el escenario create_producto dos veces, cada una en un proceso
+y con una base temporal nueva: "per_request" (PRODUCTOS_GROUP_COMMIT=false, un commit por
+POST) y "group_commit" (un commit por lote de cada worker). Con --synchronous FULL cada
+commit paga un fsync y la diferencia entre ambos modos es mayor.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SCENARIOS = {
+    "per_request": {"PRODUCTOS_GROUP_COMMIT": "false"},
+    "group_commit": {"PRODUCTOS_GROUP_COMMIT": "true"},
+}
+
+
+def run_scenario(name: str, args) -> dict:
+    output = os.path.join(tempfile.mkdtemp(prefix=f"tienda-group-{name}-"), "resultados.json")
+    env = {
+        **os.environ,
+        **SCENARIOS[name],
+        "SQLITE_SYNCHRONOUS": args.synchronous,
+        "PRODUCTOS_GROUP_COMMIT_MAX_ROWS": str(args.max_rows),
+        "PRODUCTOS_GROUP_COMMIT_MAX_DELAY_MS": str(args.max_delay_ms),
+    }
+    subprocess.run([
+        sys.executable, "-m", "benchmarks.load",
+        "--mode", args.mode, "--mix", "create_producto",
+        "--usuarios", str(args.usuarios), "--productos", "0",
+        "--concurrency", str(args.concurrency), "--workers", str(args.workers),
+        "--duration", str(args.duration), "--warmup", str(args.warmup),
+        "--output", output,
+    ], env=env, check=True, stdout=subprocess.DEVNULL)
+    with open(output) as f:
+        return {"scenario": name, **json.load(f)["total"]}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "gunicorn"], default="gunicorn")
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4, help="Workers de gunicorn")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos medidos")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos sin medir al inicio")
+    parser.add_argument("--synchronous", choices=["OFF", "NORMAL", "FULL"], default="NORMAL")
+    parser.add_argument("--max-rows", type=int, default=100)
+    parser.add_argument("--max-delay-ms", type=float, default=5)
+    parser.add_argument("--output", help="Ruta del JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    reports = [run_scenario(name, args) for name in SCENARIOS]
+
+    print(f"{'modo':<14}{'req':>8}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in reports:
+        print(f"{r['scenario']:<14}{r['requests']:>8}{r['errors']:>6}{r['throughput_rps']:>10.1f}"
+              f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "scenarios": reports}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Idempotency-Key en POST /usuarios/ y POST /productos/.
+
+Uso: python -m benchmarks.idempotency [--duplicados 20]
+
+Con dos instancias de la app en proceso (como dos workers) sobre una base SQLite
+temporal comprueba que:
+  - un reintento con la misma clave repite la respuesta (Idempotent-Replayed) sin
+    crear otra fila ni volver a calcular el hash de la contraseña;
+  - la huella guardada del cuerpo es un HMAC con clave, no un hash que permita probar
+    contraseñas;
+  - N duplicados concurrentes, repartidos entre los dos "workers", crean una sola fila
+    y reciben todos el mismo id;
+  - la misma clave con otro cuerpo se rechaza con 422;
+  - sin la caché local, la respuesta se recupera de claves_idempotencia;
+  - una clave en curso cuyo worker murió (fila sin respuesta más antigua que
+    IDEMPOTENCY_LEASE_SECONDS) la ocupa el reintento, tanto si llega con la fila ya
+    abandonada como si la fila se abandona mientras espera;
+  - con el límite de altas (RATE_LIMITS) agotado, el 429 llega antes de reclamar la
+    clave, y una petición admitida no gasta dos fichas (middleware y dependencia).
+Muestra además la latencia de un alta frente a la de su repetición. Sale con código 1
+si alguna comprobación falla.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import migrate, use_temp_database
+
+DB_PATH = use_temp_database("tienda-idempotencia-")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+
+API = "/api/v1"
+
+
+def count(sql: str, *params) -> int:
+    conn = sqlite3.connect(DB_PATH)
+    value = conn.execute(sql, params).fetchone()[0]
+    conn.close()
+    return value
+
+
+def pending_claim(ruta: str, clave: str, body: bytes, age: float):
+    # Fila en curso de una petición original cuyo worker murió hace `age` segundos
+    from src.shared.idempotency import _fingerprint
+
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(
+        "INSERT INTO claves_idempotencia (ruta, clave, huella, fecha_creacion) VALUES (?, ?, ?, ?)",
+        (ruta, clave, _fingerprint(body), str(datetime.utcnow() - timedelta(seconds=age)))
+    )
+    conn.commit()
+    conn.close()
+
+
+async def run(duplicados: int) -> int:
+    from src.config import settings
+    from src.main import app, create_app
+    from src.shared.hashing import password_hasher
+
+    hashes = [0]
+    original_hash = password_hasher.hash
+
+    async def counting_hash(password):
+        hashes[0] += 1
+        return await original_hash(password)
+
+    password_hasher.hash = counting_hash
+    otro_worker = create_app()
+
+    failures = []
+
+    def check(condition: bool, message: str):
+        print(f"[{'ok' if condition else 'FALLO'}] {message}")
+        if not condition:
+            failures.append(message)
+
+    async with app.router.lifespan_context(app):
+        clients = [
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=instance), base_url="http://tienda")
+            for instance in (app, otro_worker)
+        ]
+        client = clients[0]
+
+        usuario = json.dumps({"nombre": "Idempotente", "email": "idem@example.com", "password": "secreto"}).encode()
+        headers = {"Idempotency-Key": "alta-usuario-1", "Content-Type": "application/json"}
+        start = time.perf_counter()
+        primera = await client.post(f"{API}/usuarios/", content=usuario, headers=headers)
+        alta_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        repetida = await client.post(f"{API}/usuarios/", content=usuario, headers=headers)
+        repeticion_ms = (time.perf_counter() - start) * 1000
+        check(
+            primera.status_code == repetida.status_code == 201 and primera.json() == repetida.json(),
+            "el reintento de POST /usuarios/ repite la respuesta"
+        )
+        check(repetida.headers.get("idempotent-replayed") == "true", "la repetición lleva Idempotent-Replayed")
+        check(hashes[0] == 1, f"bcrypt se ejecuta una sola vez ({hashes[0]})")
+        conn = sqlite3.connect(DB_PATH)
+        huella = conn.execute("SELECT huella FROM claves_idempotencia WHERE clave = 'alta-usuario-1'").fetchone()[0]
+        conn.close()
+        check(
+            huella == hmac.new(settings.JWT_SECRET_KEY.encode(), usuario, "sha256").hexdigest()
+            and huella not in (hashlib.sha256(usuario).hexdigest(), hashlib.blake2b(usuario, digest_size=32).hexdigest()),
+            "la huella del cuerpo (con la contraseña) es un HMAC con el secreto del servidor"
+        )
+        print(f"       alta {alta_ms:.1f} ms, repetición {repeticion_ms:.1f} ms")
+
+        usuario_id = primera.json()["id"]
+        producto = {"nombre": "Duplicado", "precio": 5.0, "stock": 1, "usuario_id": usuario_id}
+        responses = await asyncio.gather(*(
+            clients[i % 2].post(f"{API}/productos/", json=producto, headers={"Idempotency-Key": "alta-producto-1"})
+            for i in range(duplicados)
+        ))
+        ids = {r.json().get("id") for r in responses if r.status_code == 201}
+        check(
+            all(r.status_code == 201 for r in responses) and len(ids) == 1,
+            f"{duplicados} duplicados concurrentes en dos workers: estados "
+            f"{sorted({r.status_code for r in responses})}, ids {sorted(ids)}"
+        )
+        check(count("SELECT COUNT(*) FROM productos WHERE nombre = 'Duplicado'") == 1, "una sola fila creada")
+
+        otro = await client.post(
+            f"{API}/productos/", json={**producto, "precio": 6.0}, headers={"Idempotency-Key": "alta-producto-1"}
+        )
+        check(otro.status_code == 422, f"misma clave con otro cuerpo: {otro.status_code}")
+
+        # Un worker nuevo no tiene la respuesta en memoria: sale de la tabla
+        nuevo_worker = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://tienda")
+        desde_tabla = await nuevo_worker.post(f"{API}/productos/", json=producto,
+                                              headers={"Idempotency-Key": "alta-producto-1"})
+        check(
+            desde_tabla.status_code == 201 and desde_tabla.json()["id"] in ids
+            and desde_tabla.headers.get("idempotent-replayed") == "true",
+            "repetición desde claves_idempotencia en otro worker"
+        )
+
+        sin_clave = [await client.post(f"{API}/productos/", json=producto) for _ in range(2)]
+        check(len({r.json()["id"] for r in sin_clave}) == 2, "sin Idempotency-Key cada POST crea una fila")
+
+        lease = settings.IDEMPOTENCY_LEASE_SECONDS
+        for clave, age, message in (
+            ("worker-muerto-1", lease * 2, "clave abandonada por un worker muerto"),
+            ("worker-muerto-2", lease - 1, "clave abandonada mientras el reintento espera"),
+        ):
+            body = json.dumps({**producto, "nombre": clave}).encode()
+            pending_claim(f"POST {API}/productos/", clave, body, age)
+            start = time.perf_counter()
+            response = await client.post(f"{API}/productos/", content=body, headers={
+                "Idempotency-Key": clave, "Content-Type": "application/json"
+            })
+            elapsed = time.perf_counter() - start
+            check(
+                response.status_code == 201
+                and count("SELECT COUNT(*) FROM productos WHERE nombre = ?", clave) == 1,
+                f"{message}: {response.status_code} en {elapsed:.1f} s"
+            )
+
+        # Con el límite de altas activo: cada clave nueva gasta una ficha una sola vez y,
+        # agotadas, el 429 llega antes de escribir en claves_idempotencia
+        from src.shared.rate_limit import parse_limit
+
+        from sqlalchemy import event
+        from src.shared.database import async_engine
+
+        consultas = [0]
+
+        def contar(*args):
+            consultas[0] += 1
+
+        async def alta_limitada(i: int):
+            return await client.post(f"{API}/usuarios/", content=usuario, headers={
+                "Idempotency-Key": f"limite-{i}", "Content-Type": "application/json"
+            })
+
+        capacidad = parse_limit(settings.RATE_LIMITS["usuarios_create"]["ip"])[0]
+        settings.RATE_LIMIT_ENABLED = True
+        try:
+            admitidas = [await alta_limitada(i) for i in range(capacidad)]
+            event.listen(async_engine.sync_engine, "before_cursor_execute", contar)
+            rechazadas = [await alta_limitada(capacidad + i) for i in range(5)]
+            event.remove(async_engine.sync_engine, "before_cursor_execute", contar)
+        finally:
+            settings.RATE_LIMIT_ENABLED = False
+        check(
+            all(r.status_code == 400 for r in admitidas) and all(r.status_code == 429 for r in rechazadas)
+            and consultas[0] == 0,
+            f"límite de altas antes de reclamar la clave: {capacidad} admitidas, "
+            f"{sum(r.status_code == 429 for r in rechazadas)} x 429 con {consultas[0]} consultas SQL"
+        )
+
+        for c in (*clients, nuevo_worker):
+            await c.aclose()
+
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duplicados", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    migrate()
+    return asyncio.run(run(args.duplicados))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
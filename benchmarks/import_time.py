@@ -0,0 +1,137 @@
+"""Tiempo de importación y de arranque de la app (python -X importtime).
+
+Uso: python -m benchmarks.import_time [--repeat 5] [--top 15] [--output r.json]
+                                      [--baseline benchmarks/import_time_baseline.json]
+
+Lanza intérpretes nuevos que importan src.main y ejecutan el arranque del lifespan,
+y muestra los módulos más caros. Termina con código 1 si al arrancar se importa alguna
+dependencia que debe cargarse en el primer uso (passlib, bcrypt, jose) o si, con
+--baseline, el arranque empeora más de la tolerancia.
+"""
+import argparse
+import json
+import os
+import re
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencias que solo deben importarse al primer login/hash o al primer token
+LAZY_MODULES = ["passlib", "bcrypt", "jose"]
+
+STARTUP_SCRIPT = """
+import asyncio, time
+start = time.perf_counter()
+from src.main import app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(f"{(imported - start) * 1000:.3f} {(ready - start) * 1000:.3f}")
+"""
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    directory = tempfile.mkdtemp(prefix="tienda-import-")
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'tienda.db')}"
+    env.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(32))
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    return env
+
+
+def import_profile(env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = {
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "top_level": len(indent) == 1,
+            }
+    return modules
+
+
+def startup_times(env: dict, repeat: int):
+    imports, ready = [], []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        )
+        imported_ms, ready_ms = map(float, result.stdout.split())
+        imports.append(imported_ms)
+        ready.append(ready_ms)
+    return statistics.median(imports), statistics.median(ready)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Ruta del JSON con los resultados")
+    parser.add_argument("--baseline", help="JSON de referencia con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Empeoramiento relativo permitido frente a --baseline")
+    args = parser.parse_args(argv)
+
+    env = _env()
+    modules = import_profile(env)
+    import_ms, startup_ms = startup_times(env, args.repeat)
+
+    print(f"import src.main: {import_ms:.1f} ms (mediana de {args.repeat})")
+    print(f"arranque hasta lifespan listo: {startup_ms:.1f} ms")
+    print(f"\n{'módulo':<50}{'propio':>12}{'acumulado':>12}")
+    ranked = sorted(modules.items(), key=lambda item: item[1]["self_ms"], reverse=True)
+    for name, data in ranked[:args.top]:
+        print(f"{name:<50}{data['self_ms']:>9.1f} ms{data['cumulative_ms']:>9.1f} ms")
+
+    eager = sorted(
+        name for name in modules
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+    failed = False
+    if eager:
+        print(f"\nERROR: se importan al arrancar: {', '.join(eager)}")
+        failed = True
+
+    results = {
+        "import_ms": round(import_ms, 1),
+        "startup_ms": round(startup_ms, 1),
+        "top_modules": {name: data["self_ms"] for name, data in ranked[:args.top]},
+        "eager_lazy_modules": eager,
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for key in ("import_ms", "startup_ms"):
+            limit = baseline[key] * (1 + args.tolerance)
+            status = "ok" if results[key] <= limit else "EMPEORA"
+            print(f"{key}: {results[key]:.1f} ms (referencia {baseline[key]:.1f} ms, "
+                  f"límite {limit:.1f} ms) {status}")
+            failed = failed or results[key] > limit
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
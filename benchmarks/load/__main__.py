@@ -0,0 +1,93 @@
+"""Benchmark de carga de la Tienda API.
+
+Uso: python -m benchmarks.load [--mode inprocess|uvicorn|gunicorn] [--usuarios 100]
+     [--productos 50] [--concurrency 32] [--duration 10] [--output resultados.json]
+
+Siembra una base SQLite temporal (N usuarios con M productos cada uno), lanza carga
+concurrente contra src.main:app y guarda throughput y p50/p95/p99 por endpoint en JSON.
+Requiere las dependencias de benchmarks/requirements.txt.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.common import migrate, use_temp_database
+
+
+def _parse_mix(value: str, scenarios) -> list:
+    # "get_usuario=30,list_productos=50" o solo nombres con su peso por defecto
+    mix = []
+    for item in value.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in scenarios:
+            raise SystemExit(f"Escenario desconocido: {name} (disponibles: {', '.join(scenarios)})")
+        mix.append((name, int(weight) if weight else scenarios[name][1]))
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "gunicorn"], default="inprocess")
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--productos", type=int, default=50, help="Productos por usuario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos medidos")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos sin medir al inicio")
+    parser.add_argument("--workers", type=int, default=4, help="Workers de gunicorn")
+    parser.add_argument("--mix", help="Escenarios y pesos, p. ej. get_usuario=30,login=5")
+    parser.add_argument("--output", help="Ruta del JSON con los resultados")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="Mantener los límites de peticiones (toda la carga sale de una IP)")
+    args = parser.parse_args(argv)
+
+    if not args.rate_limit:
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+    # La base temporal debe configurarse antes de importar src
+    db_path = use_temp_database("tienda-load-")
+    from .runner import run_in_process, run_server
+    from .scenarios import SCENARIOS
+    from .seed import seed
+
+    mix = _parse_mix(args.mix, SCENARIOS) if args.mix else [
+        (name, weight) for name, (_, weight) in SCENARIOS.items()
+    ]
+
+    migrate()
+    seeded = seed(f"sqlite:///{db_path}", args.usuarios, args.productos)
+    print(f"Sembrados {seeded['usuarios']} usuarios y {seeded['productos']} productos en {seeded['seconds']} s")
+
+    if args.mode == "inprocess":
+        results = asyncio.run(run_in_process(
+            mix, args.usuarios, args.concurrency, args.duration, args.warmup
+        ))
+    else:
+        results = asyncio.run(run_server(
+            args.mode, mix, args.usuarios, args.concurrency, args.duration, args.warmup, args.workers
+        ))
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {**vars(args), "mix": dict(mix)},
+        "dataset": seeded,
+        **results,
+    }
+
+    print(f"{'endpoint':<18}{'req':>8}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in {**report["endpoints"], "TOTAL": report["total"]}.items():
+        print(f"{name:<18}{r['requests']:>8}{r['errors']:>6}{r['throughput_rps']:>10.1f}"
+              f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.common import percentile
+from .scenarios import SCENARIOS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, elapsed: float, status: Optional[int]):
+        if status is None:
+            self.errors[name] += 1
+            return
+        self.statuses[name][status] += 1
+        if status >= 500:
+            self.errors[name] += 1
+        else:
+            self.latencies[name].append(elapsed)
+
+    def report(self, seconds: float) -> dict:
+        endpoints = {}
+        names = set(self.latencies) | set(self.errors) | set(self.statuses)
+        for name in sorted(names):
+            latencies = self.latencies[name]
+            endpoints[name] = {
+                "requests": len(latencies) + self.errors[name],
+                "errors": self.errors[name],
+                "statuses": {str(k): v for k, v in sorted(self.statuses[name].items())},
+                "throughput_rps": round(len(latencies) / seconds, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            }
+        total = [lat for lats in self.latencies.values() for lat in lats]
+        return {
+            "endpoints": endpoints,
+            "total": {
+                "requests": len(total) + sum(self.errors.values()),
+                "errors": sum(self.errors.values()),
+                "throughput_rps": round(len(total) / seconds, 2),
+                "p50_ms": round(percentile(total, 50) * 1000, 3),
+                "p95_ms": round(percentile(total, 95) * 1000, 3),
+                "p99_ms": round(percentile(total, 99) * 1000, 3),
+            },
+        }
+
+
+def _pick(rng: random.Random, mix: List[Tuple[str, int]]) -> str:
+    names, weights = zip(*mix)
+    return rng.choices(names, weights=weights)[0]
+
+
+async def _user(client: httpx.AsyncClient, recorder: Recorder, mix, usuarios: int,
+                deadline: float, warmup_until: float, seed: int):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        name = _pick(rng, mix)
+        method, path, body = SCENARIOS[name][0](rng, usuarios)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = None
+        if start >= warmup_until:
+            recorder.record(name, time.perf_counter() - start, status)
+
+
+async def generate_load(client: httpx.AsyncClient, mix, usuarios: int, concurrency: int,
+                        duration: float, warmup: float) -> dict:
+    recorder = Recorder()
+    start = time.perf_counter()
+    warmup_until = start + warmup
+    deadline = warmup_until + duration
+    await asyncio.gather(*(
+        _user(client, recorder, mix, usuarios, deadline, warmup_until, seed)
+        for seed in range(concurrency)
+    ))
+    return recorder.report(duration)
+
+
+async def run_in_process(mix, usuarios: int, concurrency: int, duration: float, warmup: float) -> dict:
+    # La app se importa aquí: DATABASE_URL ya apunta a la base sembrada
+    from src.main import app
+    from src.shared.database import async_engine
+    from src.shared.hashing import password_hasher
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await generate_load(client, mix, usuarios, concurrency, duration, warmup)
+    finally:
+        # Sin lifespan: cerrar el pool de bcrypt y las conexiones (hilos de aiosqlite)
+        password_hasher.shutdown()
+        await async_engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_command(mode: str, port: int, workers: int) -> List[str]:
+    if mode == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "src.main:app",
+                "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    return [sys.executable, "-m", "gunicorn", "src.main:app",
+            "--config", "gunicorn.conf.py",
+            "--worker-class", "uvicorn.workers.UvicornWorker",
+            "--workers", str(workers), "--bind", f"127.0.0.1:{port}",
+            "--log-level", "warning"]
+
+
+async def _wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                await client.get("/metrics")
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"El servidor no respondió en {timeout} s")
+
+
+async def run_server(mode: str, mix, usuarios: int, concurrency: int, duration: float,
+                     warmup: float, workers: int) -> dict:
+    port = _free_port()
+    env = dict(os.environ)
+    env["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="tienda-prom-")
+    server = subprocess.Popen(_server_command(mode, port, workers), cwd=ROOT, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        await _wait_ready(base_url)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            return await generate_load(client, mix, usuarios, concurrency, duration, warmup)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
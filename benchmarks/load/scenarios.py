@@ -0,0 +1,40 @@
+import random
+from .seed import PASSWORD, email_for
+
+API = "/api/v1"
+
+# Cada escenario devuelve (método, ruta, cuerpo JSON) para un usuario sembrado al azar
+
+
+def get_usuario(rng: random.Random, usuarios: int):
+    return "GET", f"{API}/usuarios/{email_for(rng.randint(1, usuarios))}", None
+
+
+def list_productos(rng: random.Random, usuarios: int):
+    return "GET", f"{API}/productos/usuario/{rng.randint(1, usuarios)}?limit=50", None
+
+
+def create_producto(rng: random.Random, usuarios: int):
+    return "POST", f"{API}/productos/", {
+        "nombre": "Producto de carga",
+        "descripcion": "Creado por el benchmark",
+        "precio": round(rng.uniform(1, 500), 2),
+        "stock": rng.randint(0, 50),
+        "usuario_id": rng.randint(1, usuarios),
+    }
+
+
+def login(rng: random.Random, usuarios: int):
+    return "POST", f"{API}/usuarios/login", {
+        "email": email_for(rng.randint(1, usuarios)),
+        "password": PASSWORD,
+    }
+
+
+# Nombre -> (función, peso por defecto en la mezcla)
+SCENARIOS = {
+    "get_usuario": (get_usuario, 30),
+    "list_productos": (list_productos, 50),
+    "create_producto": (create_producto, 15),
+    "login": (login, 5),
+}
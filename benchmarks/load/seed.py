@@ -0,0 +1,60 @@
+import time
+from datetime import datetime
+from sqlalchemy import create_engine, insert
+
+PASSWORD = "benchmark123"
+
+
+def email_for(usuario_id: int) -> str:
+    return f"usuario{usuario_id}@example.com"
+
+
+def seed(url: str, usuarios: int, productos_por_usuario: int, chunk_size: int = 5000) -> dict:
+    from passlib.context import CryptContext
+    from src.features.usuarios.models import Usuario
+    from src.features.productos.models import Producto
+
+    # Un solo hash para todos: sembrar no debe costar un bcrypt por usuario
+    password = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(PASSWORD)
+    now = datetime.utcnow()
+    start = time.perf_counter()
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        for first in range(1, usuarios + 1, chunk_size):
+            conn.execute(insert(Usuario), [
+                {
+                    "id": i,
+                    "nombre": f"Usuario {i}",
+                    "email": email_for(i),
+                    "password": password,
+                    "fecha_registro": now,
+                    "activo": True,
+                }
+                for i in range(first, min(first + chunk_size, usuarios + 1))
+            ])
+
+        lote = []
+        for usuario_id in range(1, usuarios + 1):
+            for j in range(productos_por_usuario):
+                lote.append({
+                    "nombre": f"Producto {j} de {usuario_id}",
+                    "descripcion": f"Descripción del producto {j}",
+                    "precio": 1.0 + (j % 500),
+                    "stock": j % 50,
+                    "usuario_id": usuario_id,
+                    "fecha_creacion": now,
+                    "activo": True,
+                })
+                if len(lote) >= chunk_size:
+                    conn.execute(insert(Producto), lote)
+                    lote = []
+        if lote:
+            conn.execute(insert(Producto), lote)
+    engine.dispose()
+
+    return {
+        "usuarios": usuarios,
+        "productos": usuarios * productos_por_usuario,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
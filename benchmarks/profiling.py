@@ -0,0 +1,145 @@
+"""Perfilado bajo demanda y registro de consultas lentas.
+
+Uso: python -m benchmarks.profiling [--productos 2000] [--peticiones 20]
+
+Con la app en proceso y una base SQLite temporal comprueba que:
+  - solo las peticiones con X-Profile igual a PROFILING_TOKEN se perfilan, y sus pilas
+    colapsadas se guardan en un fichero por ruta (y proceso), rotado por tamaño;
+  - con peticiones concurrentes de otra ruta sin perfilar, sus funciones no aparecen
+    en el perfil de la ruta perfilada;
+  - el registro de consultas lentas (con un umbral mínimo para que entre todo) anota la
+    ruta de origen y la forma de los parámetros, no sus valores.
+Muestra además la latencia con y sin perfilado. Sale con código 1 si alguna
+comprobación falla.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import migrate, percentile, use_temp_database
+
+DB_PATH = use_temp_database("tienda-perfil-")
+LOG_DIR = os.path.join(os.path.dirname(DB_PATH), "logs")
+TOKEN = "token-de-prueba"
+os.environ.update({
+    "RATE_LIMIT_ENABLED": "false",
+    "PROFILING_TOKEN": TOKEN,
+    "PROFILING_INTERVAL_MS": "1",
+    "PROFILING_DIR": os.path.join(LOG_DIR, "profiles"),
+    "SLOW_QUERY_MS": "0.001",
+    "SLOW_QUERY_LOG_DIR": LOG_DIR,
+})
+
+import httpx  # noqa: E402
+
+API = "/api/v1"
+EMAIL = "perfil@example.com"
+
+
+def seed(productos: int):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("INSERT INTO usuarios (id, nombre, email, password, activo) VALUES (1, 'Perfil', ?, 'x', 1)",
+                 (EMAIL,))
+    conn.executemany(
+        "INSERT INTO productos (nombre, precio, stock, usuario_id, fecha_creacion, "
+        "fecha_actualizacion, activo) VALUES (?, 9.5, 3, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1)",
+        [(f"Producto {i}",) for i in range(productos)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def read(pattern: str) -> str:
+    return "".join(open(path).read() for path in glob.glob(os.path.join(LOG_DIR, pattern)))
+
+
+async def latencies(client, path: str, peticiones: int, headers=None) -> float:
+    tiempos = []
+    for _ in range(peticiones):
+        start = time.perf_counter()
+        await client.get(path, headers=headers)
+        tiempos.append(time.perf_counter() - start)
+    return percentile(tiempos, 50) * 1000
+
+
+async def run(peticiones: int) -> int:
+    from src.main import app
+
+    failures = []
+
+    def check(condition: bool, message: str):
+        print(f"[{'ok' if condition else 'FALLO'}] {message}")
+        if not condition:
+            failures.append(message)
+
+    listado = f"{API}/productos/usuario/1?limit=500"
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://tienda") as client:
+            await client.get(listado, headers={"X-Profile": "otro-token"})
+            check(not read("profiles/*.folded"), "un token incorrecto no perfila")
+            response = await client.get(listado, headers=[(b"X-Profile", "café".encode("latin-1"))])
+            check(response.status_code == 200 and not read("profiles/*.folded"),
+                  f"un token no ASCII no perfila ni falla: {response.status_code}")
+
+            sin_perfil = await latencies(client, listado, peticiones)
+            await asyncio.gather(
+                latencies(client, listado, peticiones, headers={"X-Profile": TOKEN}),
+                latencies(client, f"{API}/productos/search?q=producto&limit=200", peticiones),
+            )
+            con_perfil = await latencies(client, listado, peticiones, headers={"X-Profile": TOKEN})
+            print(f"       p50 listado: {sin_perfil:.1f} ms sin perfilar, {con_perfil:.1f} ms perfilando")
+
+    perfiles = glob.glob(os.path.join(LOG_DIR, "profiles", "*.folded"))
+    nombres = [os.path.basename(path) for path in perfiles]
+    check(nombres == [f"GET_api_v1_productos_usuario_usuario_id-{os.getpid()}.folded"], f"un perfil por ruta: {nombres}")
+    perfil = read("profiles/*.folded")
+    lineas = perfil.splitlines()
+    check(
+        lineas and all(line.rsplit(" ", 1)[1].isdigit() for line in lineas),
+        f"formato de pilas colapsadas ({len(lineas)} pilas)"
+    )
+    check("get_productos_usuario" in perfil, "el perfil contiene el endpoint perfilado")
+    check("search_productos" not in perfil, "las peticiones concurrentes sin perfilar no se mezclan")
+
+    # Rotación por tamaño: nunca más de max_bytes por fichero ni más de `backups` copias
+    from collections import Counter
+    from src.shared.profiling import _write_profile
+
+    rotado = os.path.join(LOG_DIR, "rotacion", "ruta.folded")
+    for i in range(50):
+        _write_profile(rotado, Counter({f"pila;{i};" + "x" * 100: 1}), max_bytes=500, backups=2)
+    ficheros = sorted(os.listdir(os.path.dirname(rotado)))
+    check(
+        ficheros == ["ruta.folded", "ruta.folded.1", "ruta.folded.2"]
+        and all(os.path.getsize(os.path.join(os.path.dirname(rotado), f)) < 500 + 200 for f in ficheros),
+        f"los perfiles se rotan por tamaño: {ficheros}"
+    )
+
+    registros = [json.loads(line) for line in read("slow_queries-*.log").splitlines()]
+    rutas = {r["route"] for r in registros}
+    check("GET /api/v1/productos/usuario/{usuario_id}" in rutas, f"rutas de origen: {sorted(rutas)}")
+    check(all({"duration_ms", "sql", "parameters", "engine"} <= set(r) for r in registros),
+          f"{len(registros)} consultas registradas con duración, SQL y parámetros")
+    check(EMAIL not in read("slow_queries-*.log") and "Producto 1" not in read("slow_queries-*.log"),
+          "no se registran los valores de los parámetros")
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--productos", type=int, default=2000)
+    parser.add_argument("--peticiones", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    migrate()
+    seed(args.productos)
+    return asyncio.run(run(args.peticiones))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
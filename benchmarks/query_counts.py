@@ -0,0 +1,109 @@
+"""Número de consultas SQL por petición del feed de productos (sin N+1).
+
+Uso: python -m benchmarks.query_counts [--vendedores 50] [--productos 10]
+
+Siembra una base SQLite temporal y comprueba con la app en proceso que:
+  - GET /productos/?usuario_ids=... hace 1 consulta (2 con incluir_usuario) sea cual sea
+    el número de vendedores;
+  - las relaciones Usuario.productos / Producto.usuario no lanzan consultas implícitas
+    (lazy="raise_on_sql").
+Muestra además lo que cuesta el feed con una petición por vendedor. Sale con código 1 si
+alguna comprobación falla.
+"""
+import argparse
+import sqlite3
+import sys
+
+from benchmarks.common import migrate, use_temp_database
+
+DB_PATH = use_temp_database("tienda-consultas-")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+from sqlalchemy.exc import InvalidRequestError  # noqa: E402
+from src.shared.database import SessionLocal, async_engine  # noqa: E402
+from src.features.usuarios.models import Usuario  # noqa: E402
+from src.features.productos.models import Producto  # noqa: E402
+
+API = "/api/v1"
+queries = [0]
+
+
+def _count(conn, cursor, statement, parameters, context, executemany):
+    queries[0] += 1
+
+
+def seed(vendedores: int, productos: int):
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany(
+        "INSERT INTO usuarios (id, nombre, email, password, activo) VALUES (?, ?, ?, 'x', 1)",
+        [(i, f"Vendedor {i}", f"vendedor{i}@example.com") for i in range(1, vendedores + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO productos (nombre, precio, stock, usuario_id, fecha_creacion, "
+        "fecha_actualizacion, activo) VALUES (?, 9.5, 3, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1)",
+        [(f"Producto {i}-{j}", i) for i in range(1, vendedores + 1) for j in range(productos)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def count_requests(client, paths) -> int:
+    queries[0] = 0
+    for path in paths:
+        response = client.get(path)
+        assert response.status_code == 200, response.text
+    return queries[0]
+
+
+def lazy_loads_raise() -> bool:
+    # Con una sesión síncrona, lazy="select" consultaría en silencio: con raise_on_sql falla
+    with SessionLocal() as db:
+        producto = db.scalar(select(Producto).limit(1))
+        usuario = db.scalar(select(Usuario).where(Usuario.id != producto.usuario_id).limit(1))
+        results = []
+        for load in (lambda: usuario.productos, lambda: producto.usuario):
+            try:
+                load()
+                results.append(False)
+            except InvalidRequestError:
+                results.append(True)
+    return all(results)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vendedores", type=int, default=50)
+    parser.add_argument("--productos", type=int, default=10, help="Productos por vendedor")
+    args = parser.parse_args(argv)
+
+    migrate()
+    seed(args.vendedores, args.productos)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count)
+
+    from src.main import app
+
+    failures = []
+
+    def check(condition: bool, message: str):
+        print(f"[{'ok' if condition else 'FALLO'}] {message}")
+        if not condition:
+            failures.append(message)
+
+    with TestClient(app) as client:
+        for n in sorted({1, 5, args.vendedores}):
+            ids = ",".join(str(i) for i in range(1, n + 1))
+            batch = count_requests(client, [f"{API}/productos/?usuario_ids={ids}"])
+            check(batch == 1, f"{n} vendedores, feed agrupado: {batch} consultas")
+            embedded = count_requests(client, [f"{API}/productos/?usuario_ids={ids}&incluir_usuario=true"])
+            check(embedded == 2, f"{n} vendedores, feed con propietarios: {embedded} consultas")
+            per_seller = count_requests(client, [f"{API}/productos/usuario/{i}" for i in range(1, n + 1)])
+            print(f"       una petición por vendedor: {n} peticiones, {per_seller} consultas")
+
+        check(lazy_loads_raise(), "las relaciones no cargadas no lanzan SQL implícito")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
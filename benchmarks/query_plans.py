@@ -0,0 +1,185 @@
+"""Verifica con EXPLAIN QUERY PLAN que las consultas de los servicios usan índices.
+
+Uso: python -m benchmarks.query_plans
+
+Crea una base SQLite temporal con las migraciones de Alembic, ejecuta los métodos
+de los servicios capturando el SQL emitido y sale con código 1 si alguna consulta
+recorre una tabla completa (SCAN).
+"""
+import asyncio
+from datetime import datetime, timedelta
+import sqlite3
+import sys
+
+from benchmarks.common import migrate, use_temp_database
+
+DB_PATH = use_temp_database("tienda-planes-")
+
+from sqlalchemy import event  # noqa: E402
+from src.shared.database import AsyncSessionLocal, SessionLocal, async_engine  # noqa: E402
+from src.features.usuarios.models import Usuario  # noqa: E402
+from src.features.usuarios.service import AsyncUsuarioService  # noqa: E402
+from src.features.productos.models import Producto  # noqa: E402
+from src.features.productos.schemas import ProductoCreate  # noqa: E402
+from src.features.productos.service import AsyncProductoService  # noqa: E402
+
+# Planes que no implican recorrer una tabla
+ALLOWED_SCANS = ("CONSTANT ROW", "VIRTUAL TABLE")
+
+
+def seed():
+    with SessionLocal() as db:
+        for i in range(3):
+            usuario = Usuario(nombre=f"Vendedor {i}", email=f"vendedor{i}@example.com", password="x")
+            db.add(usuario)
+            db.flush()
+            db.add_all(
+                Producto(nombre=f"Producto {j}", precio=1.0 + j, stock=j, usuario_id=usuario.id)
+                for j in range(20)
+            )
+        db.commit()
+
+
+# Cada escenario ejecuta un método de servicio sobre una sesión asíncrona
+async def _usuario_por_email(db):
+    await AsyncUsuarioService(db).get_by_email("vendedor1@example.com")
+
+async def _usuario_por_id(db):
+    await AsyncUsuarioService(db).get_by_id(2)
+
+async def _productos_primera_pagina(db):
+    await AsyncProductoService(db).get_by_usuario(2, limit=10)
+
+async def _productos_con_cursor(db):
+    await AsyncProductoService(db).get_by_usuario(2, cursor=25, limit=10)
+
+async def _productos_varios_usuarios(db):
+    await AsyncProductoService(db).get_by_usuarios([1, 2], limit=5, incluir_usuario=True)
+
+async def _productos_version(db):
+    await AsyncProductoService(db).get_version_by_usuario(2)
+
+async def _resumen_usuario(db):
+    await AsyncProductoService(db).get_resumen(2)
+
+async def _productos_stream(db):
+    async for _ in AsyncProductoService(db).stream_by_usuario(2, batch_size=5):
+        pass
+
+async def _crear_producto(db):
+    await AsyncProductoService(db).create(
+        ProductoCreate(nombre="Nuevo", precio=3.5, stock=1, usuario_id=2)
+    )
+
+async def _importar_productos(db):
+    async def filas():
+        for i in range(3):
+            yield i + 1, {"nombre": f"Lote {i}", "precio": 2.0, "usuario_id": 1 + i}, None
+    await AsyncProductoService(db).bulk_create(filas(), chunk_size=2)
+
+async def _buscar_texto(db):
+    await AsyncProductoService(db).search(q="producto 1", en_stock=True, limit=5)
+
+async def _buscar_precio(db):
+    service = AsyncProductoService(db)
+    _, cursor = await service.search(precio_min=2, precio_max=10, limit=5)
+    await service.search(precio_min=2, precio_max=10, cursor=cursor, limit=5)
+
+async def _reservar(db):
+    service = AsyncProductoService(db)
+    await service.reservar_lote([(3, 1), (4, 1)])
+    try:
+        await service.reservar(5, 10_000)
+    except Exception:
+        pass
+
+async def _baja_producto(db):
+    await AsyncProductoService(db).deactivate(21, usuario_id=2)
+
+async def _baja_usuario(db):
+    await AsyncUsuarioService(db).deactivate(3)
+
+async def _purgar(db):
+    cutoff = datetime.utcnow() + timedelta(days=1)
+    await AsyncProductoService(db).purge_inactive(cutoff, batch_size=10)
+    await AsyncUsuarioService(db).purge_inactive(cutoff, batch_size=10)
+
+SCENARIOS = [
+    ("AsyncUsuarioService.get_by_email", _usuario_por_email),
+    ("AsyncUsuarioService.get_by_id", _usuario_por_id),
+    ("AsyncProductoService.get_by_usuario", _productos_primera_pagina),
+    ("AsyncProductoService.get_by_usuario (cursor)", _productos_con_cursor),
+    ("AsyncProductoService.get_by_usuarios", _productos_varios_usuarios),
+    ("AsyncProductoService.get_version_by_usuario", _productos_version),
+    ("AsyncProductoService.get_resumen", _resumen_usuario),
+    ("AsyncProductoService.stream_by_usuario", _productos_stream),
+    ("AsyncProductoService.create", _crear_producto),
+    ("AsyncProductoService.bulk_create", _importar_productos),
+    ("AsyncProductoService.search (texto)", _buscar_texto),
+    ("AsyncProductoService.search (precio)", _buscar_precio),
+    ("AsyncProductoService.reservar_lote", _reservar),
+    ("AsyncProductoService.deactivate", _baja_producto),
+    ("AsyncUsuarioService.deactivate", _baja_usuario),
+    ("purge_inactive", _purgar),
+]
+
+
+async def capture_queries():
+    captured = []
+    current = [None]
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            captured.append((current[0], statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        for name, scenario in SCENARIOS:
+            current[0] = name
+            async with AsyncSessionLocal() as db:
+                await scenario(db)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        await async_engine.dispose()
+    return captured
+
+
+def full_scans(connection, statement, parameters):
+    plan = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    details = [row[3] for row in plan]
+    # Recorrer el resultado de una subconsulta (CO-ROUTINE / MATERIALIZE) no es recorrer una tabla
+    subqueries = {
+        detail.split(" ", 1)[1] for detail in details
+        if detail.startswith(("CO-ROUTINE ", "MATERIALIZE "))
+    }
+    scans = [
+        detail for detail in details
+        if detail.startswith("SCAN ")
+        and detail[5:].split(" ")[0] not in subqueries
+        and not any(allowed in detail for allowed in ALLOWED_SCANS)
+    ]
+    return details, scans
+
+
+def main() -> int:
+    migrate()
+    seed()
+    captured = asyncio.run(capture_queries())
+
+    failures = 0
+    connection = sqlite3.connect(DB_PATH)
+    for name, statement, parameters in captured:
+        details, scans = full_scans(connection, statement, parameters)
+        status = "FALLO" if scans else "ok"
+        failures += bool(scans)
+        print(f"[{status}] {name}")
+        for detail in details:
+            print(f"        {detail}")
+    connection.close()
+
+    print(f"\n{len(captured)} consultas analizadas, {failures} con recorrido completo")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
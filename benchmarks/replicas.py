@@ -0,0 +1,126 @@
+"""Enrutado de lecturas a réplicas con dos ficheros SQLite sincronizados a mano.
+
+Uso: python -m benchmarks.replicas
+
+Crea un primario migrado y dos réplicas (copias con la API de backup de sqlite3) y
+comprueba con la app en proceso que:
+  - las lecturas de GET /productos/usuario/{id} se reparten en round-robin entre réplicas;
+  - tras una escritura, la cookie de read-after-write manda las lecturas al primario;
+  - una réplica caída se salta hasta que vuelve a responder.
+Sale con código 1 si alguna comprobación falla.
+"""
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+from benchmarks.common import migrate, use_temp_database
+
+PRIMARY_PATH = use_temp_database("tienda-replicas-")
+REPLICA_PATHS = [
+    os.path.join(os.path.dirname(PRIMARY_PATH), f"replica{i}.db") for i in range(2)
+]
+os.environ["DATABASE_REPLICA_URLS"] = json.dumps([f"sqlite:///{path}" for path in REPLICA_PATHS])
+os.environ["DB_REPLICA_HEALTH_INTERVAL"] = "0.2"
+HEALTH_WAIT = 0.3
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from src.shared.database import async_engine, read_replicas  # noqa: E402
+
+# Consultas de la aplicación por engine (sin las comprobaciones de salud)
+queries = Counter()
+
+
+def _count(name):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.strip() != "SELECT 1":
+            queries[name] += 1
+    return before_cursor_execute
+
+
+def sync_replicas():
+    # Hace de "replicación": copia el primario sobre cada réplica
+    source = sqlite3.connect(PRIMARY_PATH)
+    for path in REPLICA_PATHS:
+        if os.path.isdir(path):
+            continue
+        target = sqlite3.connect(path)
+        source.backup(target)
+        target.close()
+    source.close()
+
+
+def reads(client, path: str, times: int) -> Counter:
+    queries.clear()
+    for _ in range(times):
+        response = client.get(path)
+        assert response.status_code == 200, response.text
+    return Counter(queries)
+
+
+def main() -> int:
+    migrate()
+    sync_replicas()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count("primario"))
+    for index, replica in enumerate(read_replicas.engines):
+        event.listen(replica.sync_engine, "before_cursor_execute", _count(f"replica{index}"))
+
+    from src.main import app
+
+    failures = []
+
+    def check(condition: bool, message: str):
+        print(f"[{'ok' if condition else 'FALLO'}] {message}")
+        if not condition:
+            failures.append(message)
+
+    with TestClient(app) as client:
+        usuario = client.post("/api/v1/usuarios/", json={
+            "nombre": "Réplica", "email": "replica@example.com", "password": "secreto"
+        }).json()
+        producto = {"nombre": "Mesa", "precio": 10.0, "stock": 5, "usuario_id": usuario["id"]}
+        response = client.post("/api/v1/productos/", json=producto)
+        listado = f"/api/v1/productos/usuario/{usuario['id']}"
+
+        # Read-after-write: la escritura deja la cookie y la lectura va al primario,
+        # aunque las réplicas aún no tengan el producto
+        check("tienda_primario" in response.headers.get("set-cookie", ""),
+              "la escritura fija la cookie de read-after-write")
+        counts = reads(client, listado, 2)
+        check(set(counts) == {"primario"}, f"lecturas tras escribir al primario: {dict(counts)}")
+
+        # Sin la cookie, las réplicas atrasadas aún no ven el producto
+        client.cookies.clear()
+        check(client.get(listado).status_code == 404, "sin cookie se lee de una réplica sin sincronizar")
+
+        sync_replicas()
+        counts = reads(client, listado, 6)
+        check(counts.get("primario", 0) == 0 and counts["replica0"] == counts["replica1"] > 0,
+              f"round-robin entre réplicas: {dict(counts)}")
+
+        # Réplica caída: el fichero pasa a ser un directorio y no se puede abrir
+        read_replicas.engines[1].sync_engine.dispose()
+        os.remove(REPLICA_PATHS[1])
+        os.mkdir(REPLICA_PATHS[1])
+        time.sleep(HEALTH_WAIT)
+        counts = reads(client, listado, 4)
+        check(set(counts) == {"replica0"}, f"se salta la réplica caída: {dict(counts)}")
+
+        # Recuperación tras la siguiente comprobación de salud
+        os.rmdir(REPLICA_PATHS[1])
+        sync_replicas()
+        time.sleep(HEALTH_WAIT)
+        counts = reads(client, listado, 4)
+        check(counts["replica0"] > 0 and counts["replica1"] > 0,
+              f"la réplica recuperada vuelve a la rotación: {dict(counts)}")
+
+    shutil.rmtree(os.path.dirname(PRIMARY_PATH), ignore_errors=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""Coherencia y coste de GET /usuarios/{id}/resumen (tabla resumen_usuarios).
+
+Uso: python -m benchmarks.resumen [--productos 50000] [--repeticiones 200]
+
+Con la app en proceso y una base SQLite temporal, pasa por todas las escrituras que
+mantienen el resumen (alta con commit por petición y con group commit, importación
+masiva, reservas, baja de producto y baja de usuario) y tras cada una compara el
+resumen con un agregado calculado sobre productos. Después mide la latencia del
+endpoint para un vendedor pequeño y otro con --productos productos, y comprueba que
+`python -m src.manage recompute-resumen` deja los mismos valores. También comprueba
+que si la base se bloquea a mitad del reintento fila a fila del group commit, las
+filas ya guardadas se responden con 201 y solo las pendientes con 503. Sale con
+código 1 si alguna comprobación falla.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+from benchmarks.common import migrate, percentile, use_temp_database
+
+DB_PATH = use_temp_database("tienda-resumen-")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from src.config import settings  # noqa: E402
+
+API = "/api/v1"
+
+
+def expected(usuario_id: int) -> tuple:
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(stock), 0), COALESCE(SUM(stock * precio), 0) "
+        "FROM productos WHERE usuario_id = ? AND activo", (usuario_id,)
+    ).fetchone()
+    conn.close()
+    return row
+
+
+def matches(resumen: dict, usuario_id: int) -> bool:
+    productos, stock, valor = expected(usuario_id)
+    return (
+        resumen["productos"] == productos
+        and resumen["stock_total"] == stock
+        and abs(resumen["valor_stock"] - valor) < 1e-6
+    )
+
+
+def seed_catalogo(usuario_id: int, productos: int):
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany(
+        "INSERT INTO productos (nombre, precio, stock, usuario_id, fecha_creacion, "
+        "fecha_actualizacion, activo) VALUES (?, 2.5, 4, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1)",
+        [(f"Producto {i}", usuario_id) for i in range(productos)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def manage(*argv: str):
+    # El comando real, en otro proceso contra la misma base
+    subprocess.run([sys.executable, "-m", "src.manage", *argv], check=True, stdout=subprocess.DEVNULL)
+
+
+async def lote_con_fallo(usuario_id: int) -> list:
+    # El lote falla (IntegrityError) y, al reintentar fila a fila, la tercera agota el
+    # busy_timeout (OperationalError): las dos primeras ya están guardadas
+    from sqlalchemy.exc import IntegrityError, OperationalError
+    from src.features.productos.group_commit import producto_group_commit
+    from src.features.productos.schemas import ProductoCreate
+
+    original = producto_group_commit._commit
+    llamadas = []
+
+    async def commit(values):
+        llamadas.append(len(values))
+        if len(values) > 1:
+            raise IntegrityError("INSERT", {}, Exception("simulado"))
+        if len(llamadas) == 4:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        return await original(values)
+
+    producto_group_commit._commit = commit
+    try:
+        return await asyncio.gather(*(
+            producto_group_commit.submit(ProductoCreate(
+                nombre=f"Ocupado {i}", precio=2.0, stock=1, usuario_id=usuario_id
+            ))
+            for i in range(3)
+        ), return_exceptions=True)
+    finally:
+        del producto_group_commit._commit
+
+
+def latency_ms(client, path: str, repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        start = time.perf_counter()
+        client.get(path)
+        tiempos.append(time.perf_counter() - start)
+    return percentile(tiempos, 50) * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--productos", type=int, default=50000, help="Catálogo del vendedor grande")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    migrate()
+    from src.main import app
+
+    failures = []
+
+    def check(condition: bool, message: str):
+        print(f"[{'ok' if condition else 'FALLO'}] {message}")
+        if not condition:
+            failures.append(message)
+
+    with TestClient(app) as client:
+        usuarios = []
+        for nombre in ("Pequeño", "Grande"):
+            response = client.post(f"{API}/usuarios/", json={
+                "nombre": nombre, "email": f"{len(usuarios)}@example.com", "password": "secreto"
+            })
+            usuarios.append(response.json()["id"])
+        usuario_id, grande_id = usuarios
+        resumen_path = f"{API}/usuarios/{usuario_id}/resumen"
+
+        def step(message: str):
+            check(matches(client.get(resumen_path).json(), usuario_id), message)
+
+        step("vendedor sin productos")
+        ids = [
+            client.post(f"{API}/productos/", json={
+                "nombre": f"Alta {i}", "precio": 1.25 * (i + 1), "stock": i + 2, "usuario_id": usuario_id
+            }).json()["id"]
+            for i in range(5)
+        ]
+        step("alta con commit por petición")
+
+        settings.PRODUCTOS_GROUP_COMMIT = True
+        try:
+            for i in range(5):
+                client.post(f"{API}/productos/", json={
+                    "nombre": f"Lote {i}", "precio": 3.0, "stock": 1, "usuario_id": usuario_id
+                })
+        finally:
+            settings.PRODUCTOS_GROUP_COMMIT = False
+        step("alta con group commit")
+
+        resultados = client.portal.call(lote_con_fallo, usuario_id)
+        estados = [getattr(r, "status_code", 201) for r in resultados]
+        guardados = [r.id for r in resultados if not isinstance(r, Exception)]
+        conn = sqlite3.connect(DB_PATH)
+        filas = conn.execute("SELECT id FROM productos WHERE nombre LIKE 'Ocupado %' ORDER BY id").fetchall()
+        conn.close()
+        check(
+            estados == [201, 201, 503] and guardados == [fila[0] for fila in filas],
+            f"base ocupada a mitad del reintento fila a fila: estados {estados}, {len(filas)} filas guardadas"
+        )
+        step("alta con group commit y base ocupada")
+
+        ndjson = "".join(
+            f'{{"nombre": "Bulk {i}", "precio": 0.5, "stock": 10, "usuario_id": {usuario_id}}}\n'
+            for i in range(20)
+        )
+        client.post(f"{API}/productos/bulk", content=ndjson,
+                    headers={"Content-Type": "application/x-ndjson"})
+        step("importación masiva")
+
+        client.post(f"{API}/productos/reservar", json={
+            "items": [{"producto_id": ids[0], "cantidad": 1}, {"producto_id": ids[1], "cantidad": 2}]
+        })
+        client.post(f"{API}/productos/{ids[2]}/reservar", json={"cantidad": 10_000})
+        step("reservas (una con stock insuficiente)")
+
+        token = client.post(f"{API}/usuarios/login", json={
+            "email": "0@example.com", "password": "secreto"
+        }).json()["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        client.delete(f"{API}/productos/{ids[3]}", headers=auth)
+        step("baja de producto")
+
+        # El vendedor grande se siembra fuera de la API y se repara con recompute
+        seed_catalogo(grande_id, args.productos)
+        manage("recompute-resumen", "--usuario-id", str(grande_id))
+        grande_path = f"{API}/usuarios/{grande_id}/resumen"
+        check(matches(client.get(grande_path).json(), grande_id), "recompute de un vendedor")
+
+        pequeno = latency_ms(client, resumen_path, args.repeticiones)
+        grande = latency_ms(client, grande_path, args.repeticiones)
+        print(f"       p50 resumen: {pequeno:.2f} ms (vendedor pequeño), {grande:.2f} ms ({args.productos} productos)")
+
+        antes = client.get(resumen_path).json()
+        manage("recompute-resumen")
+        despues = client.get(resumen_path).json()
+        check(
+            {k: antes[k] for k in ("productos", "stock_total")} == {k: despues[k] for k in ("productos", "stock_total")}
+            and abs(antes["valor_stock"] - despues["valor_stock"]) < 1e-6,
+            "el mantenimiento incremental coincide con el recompute completo"
+        )
+
+        client.delete(f"{API}/usuarios/{usuario_id}", headers=auth)
+        conn = sqlite3.connect(DB_PATH)
+        fila = conn.execute(
+            "SELECT productos, stock_total, valor_stock FROM resumen_usuarios WHERE usuario_id = ?",
+            (usuario_id,)
+        ).fetchone()
+        conn.close()
+        check(fila == (0, 0, 0) and expected(usuario_id)[0] == 0,
+              f"baja de usuario: resumen a cero {fila}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Búsqueda de productos: FTS5 (GET /productos/search) frente a un recorrido con LIKE.
+
+Uso: python -m benchmarks.search [--rows 1000000] [--repeat 20] [--output r.json]
+
+Siembra una base SQLite temporal migrada (los triggers mantienen productos_fts) con
+nombres y descripciones aleatorias, y mide la primera página (50 resultados) para
+términos frecuentes y poco frecuentes, con y sin filtro de precio.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import migrate, percentile, use_temp_database
+
+DB_PATH = use_temp_database("tienda-busqueda-")
+
+from sqlalchemy import or_, select  # noqa: E402
+from src.shared.database import AsyncSessionLocal, async_engine  # noqa: E402
+from src.features.usuarios import models as usuarios_models  # noqa: E402,F401
+from src.features.productos.models import Producto  # noqa: E402
+from src.features.productos.service import AsyncProductoService  # noqa: E402
+
+WORDS = [
+    "mesa", "silla", "lampara", "sofa", "cama", "armario", "estante", "cojin", "alfombra",
+    "espejo", "madera", "metal", "vidrio", "roble", "pino", "blanco", "negro", "rojo", "azul",
+    "verde", "grande", "pequeño", "moderno", "clasico", "jardin", "cocina", "oficina", "baño",
+]
+# Términos poco frecuentes: aparecen en ~1 de cada 10.000 productos
+RARE_WORDS = ["vintage", "artesanal", "bambu", "terciopelo"]
+
+
+def seed(rows: int, chunk_size: int = 10000):
+    rng = random.Random(42)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(
+        "INSERT INTO usuarios (id, nombre, email, password, activo) "
+        "VALUES (1, 'Bench', 'bench@example.com', 'x', 1)"
+    )
+
+    def text(n):
+        words = rng.choices(WORDS, k=n)
+        if rng.random() < 0.0001:
+            words.append(rng.choice(RARE_WORDS))
+        return " ".join(words)
+
+    for first in range(0, rows, chunk_size):
+        conn.executemany(
+            "INSERT INTO productos (nombre, descripcion, precio, stock, usuario_id, fecha_creacion, activo) "
+            "VALUES (?, ?, ?, ?, 1, CURRENT_TIMESTAMP, 1)",
+            [
+                (text(3), text(10), round(rng.uniform(1, 1000), 2), rng.randint(0, 20))
+                for _ in range(min(chunk_size, rows - first))
+            ]
+        )
+        conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+async def _fts(db, term, precio_max):
+    await AsyncProductoService(db).search(q=term, precio_max=precio_max, limit=50)
+
+
+async def _like(db, term, precio_max):
+    pattern = f"%{term}%"
+    query = select(Producto).where(
+        Producto.activo == True,
+        or_(Producto.nombre.like(pattern), Producto.descripcion.like(pattern))
+    )
+    if precio_max is not None:
+        query = query.where(Producto.precio <= precio_max)
+    await db.scalars(query.order_by(Producto.id).limit(50))
+
+
+async def measure(fn, term, precio_max, repeat):
+    latencies = []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await fn(db, term, precio_max)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run(repeat: int) -> list:
+    cases = [
+        ("frecuente", "mesa", None),
+        ("frecuente + precio", "mesa", 50.0),
+        ("poco frecuente", "vintage", None),
+        ("poco frecuente + precio", "vintage", 50.0),
+    ]
+    results = []
+    try:
+        for name, term, precio_max in cases:
+            row = {"case": name, "term": term, "precio_max": precio_max}
+            for label, fn in (("fts", _fts), ("like", _like)):
+                latencies = await measure(fn, term, precio_max, repeat)
+                row[f"{label}_p50_ms"] = round(percentile(latencies, 50) * 1000, 3)
+                row[f"{label}_p99_ms"] = round(percentile(latencies, 99) * 1000, 3)
+            results.append(row)
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Ruta del JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    migrate()
+    start = time.perf_counter()
+    seed(args.rows)
+    print(f"Sembrados {args.rows} productos en {time.perf_counter() - start:.1f} s")
+
+    results = asyncio.run(run(args.repeat))
+    print(f"{'caso':<26}{'fts p50':>12}{'fts p99':>12}{'like p50':>12}{'like p99':>12}")
+    for r in results:
+        print(f"{r['case']:<26}{r['fts_p50_ms']:>9.2f} ms{r['fts_p99_ms']:>9.2f} ms"
+              f"{r['like_p50_ms']:>9.2f} ms{r['like_p99_ms']:>9.2f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
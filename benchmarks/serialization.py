@@ -0,0 +1,98 @@
+"""Coste de serializar listados de productos: ruta por defecto de FastAPI vs dump_json.
+
+Uso: python -m benchmarks.serialization [--sizes 10,100,1000,10000,100000] [--output r.json]
+
+Compara, sobre objetos ORM Producto sin base de datos:
+  fastapi_json    response_model + jsonable_encoder + JSONResponse (comportamiento anterior)
+  fastapi_orjson  lo mismo con ORJSONResponse como clase por defecto
+  dump_json       pydantic_response: una validación y TypeAdapter.dump_json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+from benchmarks.common import use_temp_database
+
+use_temp_database("tienda-serializacion-")
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from src.features.usuarios import models as usuarios_models  # noqa: E402,F401
+from src.features.productos import models, schemas  # noqa: E402
+from src.shared.responses import pydantic_response  # noqa: E402
+
+
+def build_productos(n: int) -> list:
+    now = datetime.utcnow()
+    return [
+        models.Producto(
+            id=i, nombre=f"Producto {i}", descripcion="Descripción de prueba " * 3,
+            precio=10.5 + i, stock=i % 40, usuario_id=1, fecha_creacion=now, activo=True
+        )
+        for i in range(n)
+    ]
+
+
+def _fastapi(response_class):
+    field = create_response_field(name="response", type_=List[schemas.Producto])
+
+    def run(productos):
+        content = asyncio.run(serialize_response(field=field, response_content=productos))
+        return response_class(content=content).body
+    return run
+
+
+def _dump_json(productos):
+    return pydantic_response(List[schemas.Producto], productos).body
+
+
+STRATEGIES = {
+    "fastapi_json": _fastapi(JSONResponse),
+    "fastapi_orjson": _fastapi(ORJSONResponse),
+    "dump_json": _dump_json,
+}
+
+
+def measure(fn, productos, min_seconds: float = 0.5) -> float:
+    fn(productos)  # calentamiento
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn(productos)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / runs
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000")
+    parser.add_argument("--output", help="Ruta del JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'n':>8}" + "".join(f"{name:>18}" for name in STRATEGIES) + f"{'speedup':>10}")
+    for n in (int(size) for size in args.sizes.split(",")):
+        productos = build_productos(n)
+        row = {"n": n}
+        for name, fn in STRATEGIES.items():
+            row[f"{name}_ms"] = round(measure(fn, productos) * 1000, 3)
+        row["speedup"] = round(row["fastapi_json_ms"] / row["dump_json_ms"], 2)
+        results.append(row)
+        print(f"{n:>8}" + "".join(f"{row[f'{name}_ms']:>15.3f} ms" for name in STRATEGIES)
+              + f"{row['speedup']:>9.2f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Concurrencia de lecturas y escrituras en SQLite, con y sin los PRAGMA de database.py.
+
+Uso: python -m benchmarks.sqlite_concurrency [--writers 4] [--readers 4] [--seconds 5] [--output r.json]
+
+Cada escenario usa una base temporal nueva y procesos separados (como los workers de
+gunicorn). "default" es la configuración anterior (journal DELETE, synchronous FULL);
+"tuned" aplica WAL, synchronous, busy_timeout, mmap_size y cache_size desde Settings.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import percentile
+
+INSERT_SQL = (
+    "INSERT INTO productos (nombre, descripcion, precio, stock, usuario_id, fecha_creacion, activo) "
+    "VALUES (:nombre, NULL, 9.5, 1, 1, CURRENT_TIMESTAMP, 1)"
+)
+SELECT_SQL = (
+    "SELECT id, nombre, precio, stock FROM productos "
+    "WHERE usuario_id = 1 AND activo = 1 ORDER BY id DESC LIMIT 50"
+)
+
+
+def _create_database(url: str):
+    from sqlalchemy import create_engine, text
+    from src.shared.database import Base
+    from src.features.usuarios import models as usuarios_models  # noqa: F401
+    from src.features.productos import models as productos_models  # noqa: F401
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO usuarios (nombre, email, password, activo) "
+            "VALUES ('Bench', 'bench@example.com', 'x', 1)"
+        ))
+    engine.dispose()
+
+
+def _worker(role: str, url: str, tuned: bool, seconds: float, results):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import OperationalError
+    from src.shared.database import apply_sqlite_pragmas
+
+    engine = create_engine(url, pool_size=1, max_overflow=0)
+    if tuned:
+        apply_sqlite_pragmas(engine)
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                if role == "writer":
+                    conn.execute(text(INSERT_SQL), {"nombre": f"p-{os.getpid()}-{i}"})
+                else:
+                    conn.execute(text(SELECT_SQL)).fetchall()
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    engine.dispose()
+    results.put((role, latencies, errors))
+
+
+def run_scenario(name: str, tuned: bool, writers: int, readers: int, seconds: float) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix=f"tienda-sqlite-{name}-"), "tienda.db")
+    url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = url
+    _create_database(url)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_worker, args=(role, url, tuned, seconds, results))
+        for role in ["writer"] * writers + ["reader"] * readers
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    report = {"scenario": name}
+    for role in ("writer", "reader"):
+        latencies = [lat for r, lats, _ in collected if r == role for lat in lats]
+        errors = sum(errs for r, _, errs in collected if r == role)
+        report[role] = {
+            "ops": len(latencies),
+            "ops_per_second": round(len(latencies) / seconds, 1),
+            "errors": errors,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        }
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--output", help="Ruta del JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    reports = [
+        run_scenario("default", False, args.writers, args.readers, args.seconds),
+        run_scenario("tuned", True, args.writers, args.readers, args.seconds),
+    ]
+    for report in reports:
+        print(f"== {report['scenario']}")
+        for role in ("writer", "reader"):
+            r = report[role]
+            print(
+                f"  {role:<7} {r['ops_per_second']:>10.1f} ops/s  p50 {r['p50_ms']:>8.3f} ms  "
+                f"p99 {r['p99_ms']:>8.3f} ms  errores {r['errors']}"
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
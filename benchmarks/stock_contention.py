@@ -0,0 +1,140 @@
+"""Prueba de estrés de reservas de stock concurrentes: comprueba que no hay sobreventa.
+
+Uso: python -m benchmarks.stock_contention [--processes 4] [--clients 16] [--stock 200]
+     [--productos 5] [--output r.json]
+
+Varios procesos (como los workers de gunicorn) con muchos clientes concurrentes cada uno
+reservan con AsyncProductoService contra la misma base SQLite temporal hasta agotar el
+stock, mezclando reservas individuales y carritos. Sale con código 1 si el stock final
+no cuadra con lo reservado o si algún producto queda en negativo.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import migrate, use_temp_database
+
+
+def _worker(url: str, producto_ids, clients: int, seed: int, results):
+    import os
+    os.environ["DATABASE_URL"] = url
+
+    from fastapi import HTTPException
+    from src.shared.database import AsyncSessionLocal, async_engine
+    from src.features.productos.service import AsyncProductoService
+
+    reservado = {pid: 0 for pid in producto_ids}
+    stats = {"ok": 0, "conflictos": 0, "ocupado": 0}
+
+    async def client(n):
+        rng = random.Random(seed * 1000 + n)
+        agotados = set()
+        while len(agotados) < len(producto_ids):
+            disponibles = [pid for pid in producto_ids if pid not in agotados]
+            if rng.random() < 0.5:
+                items = [(rng.choice(disponibles), rng.randint(1, 3))]
+            else:
+                items = [(pid, 1) for pid in rng.sample(disponibles, min(2, len(disponibles)))]
+            async with AsyncSessionLocal() as db:
+                try:
+                    await AsyncProductoService(db).reservar_lote(items)
+                except HTTPException as exc:
+                    if exc.status_code == 409:
+                        stats["conflictos"] += 1
+                        for conflicto in exc.detail["conflictos"]:
+                            if not conflicto["disponible"]:
+                                agotados.add(conflicto["producto_id"])
+                    else:
+                        stats["ocupado"] += 1
+                    continue
+            stats["ok"] += 1
+            for pid, cantidad in items:
+                reservado[pid] += cantidad
+
+    async def run():
+        try:
+            await asyncio.gather(*(client(n) for n in range(clients)))
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(run())
+    results.put((reservado, stats))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=16, help="Clientes concurrentes por proceso")
+    parser.add_argument("--stock", type=int, default=200, help="Stock inicial por producto")
+    parser.add_argument("--productos", type=int, default=5)
+    parser.add_argument("--output", help="Ruta del JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    path = use_temp_database("tienda-stock-")
+    url = f"sqlite:///{path}"
+    migrate()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO usuarios (id, nombre, email, password, activo) VALUES (1, 'B', 'b@example.com', 'x', 1)")
+    conn.executemany(
+        "INSERT INTO productos (id, nombre, precio, stock, usuario_id, activo) VALUES (?, ?, 1.0, ?, 1, 1)",
+        [(pid, f"Producto {pid}", args.stock) for pid in range(1, args.productos + 1)]
+    )
+    conn.commit()
+    producto_ids = list(range(1, args.productos + 1))
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    start = time.perf_counter()
+    processes = [
+        ctx.Process(target=_worker, args=(url, producto_ids, args.clients, seed, results))
+        for seed in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    reservado = {pid: sum(r[pid] for r, _ in collected) for pid in producto_ids}
+    stats = {key: sum(s[key] for _, s in collected) for key in ("ok", "conflictos", "ocupado")}
+    finales = dict(conn.execute("SELECT id, stock FROM productos").fetchall())
+    conn.close()
+
+    errores = []
+    for pid in producto_ids:
+        if finales[pid] < 0:
+            errores.append(f"producto {pid}: stock negativo ({finales[pid]})")
+        if reservado[pid] + finales[pid] != args.stock:
+            errores.append(
+                f"producto {pid}: reservado {reservado[pid]} + final {finales[pid]} != {args.stock}"
+            )
+
+    report = {
+        "config": vars(args),
+        "seconds": round(elapsed, 3),
+        "reservas_por_segundo": round(stats["ok"] / elapsed, 1),
+        **stats,
+        "reservado": reservado,
+        "stock_final": finales,
+        "errores": errores,
+    }
+    print(f"{stats['ok']} reservas, {stats['conflictos']} conflictos, {stats['ocupado']} ocupado "
+          f"en {elapsed:.2f} s ({report['reservas_por_segundo']} reservas/s)")
+    for pid in producto_ids:
+        print(f"  producto {pid}: reservado {reservado[pid]}, stock final {finales[pid]}")
+    print("SOBREVENTA DETECTADA:\n  " + "\n  ".join(errores) if errores else "Sin sobreventa")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
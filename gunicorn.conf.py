@@ -0,0 +1,16 @@
+# Hooks de gunicorn; las opciones de arranque están en start_gunicorn.sh
+
+def child_exit(server, worker):
+    # Limpia las métricas del worker que termina (modo multiproceso de Prometheus)
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Con --preload los workers heredan los engines del master: descartar sus
+    # conexiones (sin cerrarlas) para que cada worker abra las suyas
+    from src.shared.database import async_engine, engine, read_replicas
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for replica in read_replicas.engines:
+        replica.sync_engine.dispose(close=False)
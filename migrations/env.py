@@ -0,0 +1,54 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from src.config import settings
+from src.shared.database import Base
+# Importar los modelos para registrar sus tablas en Base.metadata
+from src.features.usuarios import models as usuarios_models  # noqa: F401
+from src.features.productos import models as productos_models  # noqa: F401
+from src.shared import idempotency  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def include_name(name, type_, parent_names):
+    # La tabla FTS5 y sus tablas internas se gestionan con SQL propio
+    if type_ == "table" and name and name.startswith("productos_fts"):
+        return False
+    return True
+
+def run_migrations_offline():
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        include_name=include_name
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connectable = config.attributes.get("connection")
+    if connectable is None:
+        connectable = create_engine(settings.DATABASE_URL)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite no soporta ALTER TABLE completo
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_name=include_name
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,57 @@
+"""esquema inicial
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Las bases creadas antes con Base.metadata.create_all ya tienen estas tablas
+    if sa.inspect(op.get_bind()).has_table("usuarios"):
+        return
+
+    op.create_table(
+        "usuarios",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=100), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("password", sa.String(length=255), nullable=False),
+        sa.Column("fecha_registro", sa.DateTime(), nullable=True),
+        sa.Column("activo", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_usuarios_email", "usuarios", ["email"], unique=True)
+    op.create_index("ix_usuarios_id", "usuarios", ["id"], unique=False)
+
+    op.create_table(
+        "productos",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=200), nullable=False),
+        sa.Column("descripcion", sa.String(length=500), nullable=True),
+        sa.Column("precio", sa.Float(), nullable=False),
+        sa.Column("stock", sa.Integer(), nullable=True),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("fecha_creacion", sa.DateTime(), nullable=True),
+        sa.Column("activo", sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_productos_id", "productos", ["id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_productos_id", table_name="productos")
+    op.drop_table("productos")
+    op.drop_index("ix_usuarios_id", table_name="usuarios")
+    op.drop_index("ix_usuarios_email", table_name="usuarios")
+    op.drop_table("usuarios")
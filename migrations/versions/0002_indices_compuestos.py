@@ -0,0 +1,35 @@
+"""indices compuestos para los filtros frecuentes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_productos_usuario_activo",
+        "productos",
+        ["usuario_id", "activo", "id"],
+        unique=False
+    )
+    op.create_index(
+        "ix_usuarios_email_activo",
+        "usuarios",
+        ["email", "activo"],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_usuarios_email_activo", table_name="usuarios")
+    op.drop_index("ix_productos_usuario_activo", table_name="productos")
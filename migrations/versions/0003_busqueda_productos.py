@@ -0,0 +1,69 @@
+"""busqueda de productos: FTS5 en SQLite, tsvector en Postgres e indice de precio
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+FTS_SQLITE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+        nombre, descripcion, content='productos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts(rowid, nombre, descripcion)
+        VALUES (new.id, new.nombre, new.descripcion);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, nombre, descripcion)
+        VALUES ('delete', old.id, old.nombre, old.descripcion);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF nombre, descripcion ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, nombre, descripcion)
+        VALUES ('delete', old.id, old.nombre, old.descripcion);
+        INSERT INTO productos_fts(rowid, nombre, descripcion)
+        VALUES (new.id, new.nombre, new.descripcion);
+    END""",
+    # Indexar los productos existentes
+    "INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    op.create_index(
+        "ix_productos_activo_precio",
+        "productos",
+        ["activo", "precio", "id"],
+        unique=False
+    )
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in FTS_SQLITE:
+            op.execute(statement)
+    elif dialect == "postgresql":
+        op.execute(
+            "CREATE INDEX ix_productos_busqueda ON productos USING gin "
+            "(to_tsvector('simple', coalesce(nombre, '') || ' ' || coalesce(descripcion, '')))"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("productos_fts_ai", "productos_fts_ad", "productos_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS productos_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_productos_busqueda")
+
+    op.drop_index("ix_productos_activo_precio", table_name="productos")
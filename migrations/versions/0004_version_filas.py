@@ -0,0 +1,37 @@
+"""version de las filas (fecha_actualizacion) para los ETag
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("usuarios", sa.Column("fecha_actualizacion", sa.DateTime(), nullable=True))
+    op.add_column("productos", sa.Column("fecha_actualizacion", sa.DateTime(), nullable=True))
+    # Las filas existentes toman como versión su fecha de alta
+    op.execute("UPDATE usuarios SET fecha_actualizacion = fecha_registro")
+    op.execute("UPDATE productos SET fecha_actualizacion = fecha_creacion")
+    op.create_index(
+        "ix_productos_usuario_actualizacion",
+        "productos",
+        ["usuario_id", "fecha_actualizacion"],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_productos_usuario_actualizacion", table_name="productos")
+    # DROP COLUMN directo (SQLite >= 3.35): el modo batch recrearía productos y
+    # perdería los triggers de productos_fts
+    op.drop_column("productos", "fecha_actualizacion")
+    op.drop_column("usuarios", "fecha_actualizacion")
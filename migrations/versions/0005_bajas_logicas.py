@@ -0,0 +1,100 @@
+"""bajas logicas: fecha_baja, indices parciales WHERE activo y tablas de archivo
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+ACTIVO = {"sqlite_where": sa.text("activo = 1"), "postgresql_where": sa.text("activo")}
+INACTIVO = {"sqlite_where": sa.text("activo = 0"), "postgresql_where": sa.text("NOT activo")}
+
+TSVECTOR_SQL = "to_tsvector('simple', coalesce(nombre, '') || ' ' || coalesce(descripcion, ''))"
+
+
+def upgrade():
+    op.add_column("usuarios", sa.Column("fecha_baja", sa.DateTime(), nullable=True))
+    op.add_column("productos", sa.Column("fecha_baja", sa.DateTime(), nullable=True))
+    # Las filas ya inactivas toman como fecha de baja su última actualización
+    op.execute("UPDATE usuarios SET fecha_baja = fecha_actualizacion WHERE NOT activo")
+    op.execute("UPDATE productos SET fecha_baja = fecha_actualizacion WHERE NOT activo")
+
+    # El email deja de ser único entre las cuentas dadas de baja
+    op.drop_index("ix_usuarios_email_activo", table_name="usuarios")
+    op.drop_index("ix_usuarios_email", table_name="usuarios")
+    op.create_index("ix_usuarios_email_activo", "usuarios", ["email"], unique=True, **ACTIVO)
+    op.create_index("ix_usuarios_baja", "usuarios", ["fecha_baja"], **INACTIVO)
+
+    op.drop_index("ix_productos_usuario_activo", table_name="productos")
+    op.create_index("ix_productos_usuario_activo", "productos", ["usuario_id", "id"], **ACTIVO)
+    op.drop_index("ix_productos_activo_precio", table_name="productos")
+    op.create_index("ix_productos_activo_precio", "productos", ["precio", "id"], **ACTIVO)
+    op.create_index("ix_productos_baja", "productos", ["fecha_baja"], **INACTIVO)
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_productos_busqueda")
+        op.execute(
+            f"CREATE INDEX ix_productos_busqueda ON productos USING gin ({TSVECTOR_SQL}) WHERE activo"
+        )
+
+    op.create_table(
+        "usuarios_archivo",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=100), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("password", sa.String(length=255), nullable=False),
+        sa.Column("fecha_registro", sa.DateTime(), nullable=True),
+        sa.Column("fecha_actualizacion", sa.DateTime(), nullable=True),
+        sa.Column("fecha_baja", sa.DateTime(), nullable=True),
+        sa.Column("fecha_archivo", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "productos_archivo",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=200), nullable=False),
+        sa.Column("descripcion", sa.String(length=500), nullable=True),
+        sa.Column("precio", sa.Float(), nullable=False),
+        sa.Column("stock", sa.Integer(), nullable=True),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("fecha_creacion", sa.DateTime(), nullable=True),
+        sa.Column("fecha_actualizacion", sa.DateTime(), nullable=True),
+        sa.Column("fecha_baja", sa.DateTime(), nullable=True),
+        sa.Column("fecha_archivo", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_productos_archivo_usuario_id", "productos_archivo", ["usuario_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_productos_archivo_usuario_id", table_name="productos_archivo")
+    op.drop_table("productos_archivo")
+    op.drop_table("usuarios_archivo")
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_productos_busqueda")
+        op.execute(f"CREATE INDEX ix_productos_busqueda ON productos USING gin ({TSVECTOR_SQL})")
+
+    op.drop_index("ix_productos_baja", table_name="productos")
+    op.drop_index("ix_productos_activo_precio", table_name="productos")
+    op.create_index("ix_productos_activo_precio", "productos", ["activo", "precio", "id"], unique=False)
+    op.drop_index("ix_productos_usuario_activo", table_name="productos")
+    op.create_index("ix_productos_usuario_activo", "productos", ["usuario_id", "activo", "id"], unique=False)
+
+    op.drop_index("ix_usuarios_baja", table_name="usuarios")
+    op.drop_index("ix_usuarios_email_activo", table_name="usuarios")
+    op.create_index("ix_usuarios_email", "usuarios", ["email"], unique=True)
+    op.create_index("ix_usuarios_email_activo", "usuarios", ["email", "activo"], unique=False)
+
+    # DROP COLUMN directo (SQLite >= 3.35): el modo batch recrearía productos y
+    # perdería los triggers de productos_fts
+    op.drop_column("productos", "fecha_baja")
+    op.drop_column("usuarios", "fecha_baja")
@@ -0,0 +1,37 @@
+"""resumen_usuarios: agregados por vendedor de sus productos activos
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "resumen_usuarios",
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("productos", sa.Integer(), nullable=False),
+        sa.Column("stock_total", sa.Integer(), nullable=False),
+        sa.Column("valor_stock", sa.Float(), nullable=False),
+        sa.Column("fecha_actualizacion", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("usuario_id"),
+    )
+    # Carga inicial; después se mantiene en cada escritura de productos
+    op.execute(
+        "INSERT INTO resumen_usuarios (usuario_id, productos, stock_total, valor_stock, fecha_actualizacion) "
+        "SELECT usuario_id, COUNT(*), COALESCE(SUM(stock), 0), COALESCE(SUM(stock * precio), 0), "
+        "CURRENT_TIMESTAMP FROM productos WHERE activo GROUP BY usuario_id"
+    )
+
+
+def downgrade():
+    op.drop_table("resumen_usuarios")
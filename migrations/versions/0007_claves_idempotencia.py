@@ -0,0 +1,37 @@
+"""claves_idempotencia: respuestas guardadas por Idempotency-Key
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "claves_idempotencia",
+        sa.Column("ruta", sa.String(length=200), nullable=False),
+        sa.Column("clave", sa.String(length=255), nullable=False),
+        sa.Column("huella", sa.String(length=64), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("headers", sa.Text(), nullable=True),
+        sa.Column("body", sa.LargeBinary(), nullable=True),
+        sa.Column("fecha_creacion", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("ruta", "clave"),
+    )
+    op.create_index(
+        "ix_claves_idempotencia_fecha_creacion", "claves_idempotencia", ["fecha_creacion"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_claves_idempotencia_fecha_creacion", table_name="claves_idempotencia")
+    op.drop_table("claves_idempotencia")
@@ -1,7 +1,133 @@
+from typing import Dict, List, Optional
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./tienda.db"
     API_V1_STR: str = "/api/v1"
 
+    # Pool de conexiones (por engine y por worker de gunicorn)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+
+    # Réplicas de lectura (JSON, p. ej. '["postgresql://replica1/tienda"]'); vacío = todo al primario
+    DATABASE_REPLICA_URLS: List[str] = []
+    DB_REPLICA_HEALTH_INTERVAL: float = 5.0
+    DB_REPLICA_HEALTH_TIMEOUT: float = 1.0
+    # Tras una escritura, las lecturas de ese cliente van al primario durante este tiempo
+    READ_AFTER_WRITE_SECONDS: int = 5
+
+    # PRAGMA aplicados a cada conexión SQLite
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE: int = -64000
+
+    # Hash de contraseñas: el primer esquema es el activo, los demás solo se verifican
+    # y se migran en el siguiente login. Los hashes con otro coste también se migran
+    PASSWORD_SCHEMES: List[str] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+
+    # Pool de procesos para bcrypt (por worker de gunicorn)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_RETRY_AFTER: int = 1
+
+    # Respuestas JSON con orjson (si está instalado)
+    ORJSON_RESPONSES: bool = True
+
+    # Respuestas condicionales (ETag): el cliente revalida cada sondeo con If-None-Match
+    HTTP_CACHE_CONTROL: str = "private, no-cache"
+
+    # Compresión de respuestas (brotli si está instalado y el cliente lo acepta, si no gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Tokens JWT de sesión. JWT_SECRET_KEY es obligatoria (sin ella no arranca): un valor
+    # por defecto publicado en el repositorio permitiría firmar tokens válidos. Al menos
+    # 32 caracteres, p. ej. `python -c "import secrets; print(secrets.token_urlsafe(32))"`
+    JWT_SECRET_KEY: str = Field(min_length=32)
+    JWT_ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Lista de revocación (logout y rotación de refresh tokens). Usa CACHE_URL si está
+    # definida; sin ella es local a cada worker y un token revocado o un refresh token ya
+    # rotado sigue valiendo en los demás workers hasta que caduca
+    TOKEN_REVOCATION_MAX_SIZE: int = 100000
+
+    # Paginación y streaming de listados de productos
+    PRODUCTOS_PAGE_SIZE: int = 50
+    PRODUCTOS_PAGE_SIZE_MAX: int = 500
+    # Vendedores admitidos en GET /productos/?usuario_ids=...
+    PRODUCTOS_USUARIOS_MAX: int = 100
+    PRODUCTOS_STREAM_BATCH_SIZE: int = 1000
+    # Group commit de altas: agrupa los POST /productos/ de cada worker en una
+    # transacción cada MAX_DELAY_MS milisegundos o MAX_ROWS filas
+    PRODUCTOS_GROUP_COMMIT: bool = False
+    PRODUCTOS_GROUP_COMMIT_MAX_ROWS: int = 100
+    PRODUCTOS_GROUP_COMMIT_MAX_DELAY_MS: float = 5
+
+    # Importación masiva de productos
+    PRODUCTOS_BULK_CHUNK_SIZE: int = 1000
+    PRODUCTOS_BULK_MAX_ERRORES: int = 1000
+
+    # Purga de bajas: se archivan las filas inactivas desde hace más de PURGE_AFTER_DAYS
+    PURGE_AFTER_DAYS: int = 90
+    PURGE_BATCH_SIZE: int = 1000
+    PURGE_BATCH_PAUSE: float = 0.1
+
+    # Idempotency-Key en los POST de alta (rutas relativas a API_V1_STR): la primera
+    # respuesta se guarda en claves_idempotencia y en una caché LRU local por worker
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_PATHS: List[str] = ["/usuarios/", "/productos/"]
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_CACHE_MAX_KEYS: int = 10000
+    # Espera máxima de un duplicado a que termine la petición original
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    # Una petición original sin respuesta tras este tiempo se da por muerta (OOM, timeout
+    # de gunicorn, deploy) y un reintento ocupa su lugar. Mayor que el timeout de gunicorn
+    IDEMPOTENCY_LEASE_SECONDS: float = 60.0
+
+    # Perfilado bajo demanda: peticiones con la cabecera X-Profile igual a PROFILING_TOKEN
+    # (sin token no se admite) o una fracción PROFILING_SAMPLE_RATE de todas. Las pilas
+    # colapsadas se acumulan en PROFILING_DIR, un fichero por ruta y proceso rotado por tamaño
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5
+    PROFILING_DIR: str = "logs/profiles"
+    PROFILING_MAX_BYTES: int = 10 * 1024 * 1024
+    PROFILING_BACKUPS: int = 5
+
+    # Consultas que tardan SLOW_QUERY_MS o más (0 lo desactiva), con su ruta de origen,
+    # en SLOW_QUERY_LOG_DIR/slow_queries-<pid>.log rotado por tamaño
+    SLOW_QUERY_MS: float = 200
+    SLOW_QUERY_MAX_SQL: int = 2000
+    SLOW_QUERY_LOG_DIR: str = "logs"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+
+    # Caché de usuarios. Sin CACHE_URL es local a cada worker (la invalidación
+    # no llega a los demás hasta que expira el TTL); con CACHE_URL usa Redis
+    CACHE_URL: Optional[str] = None
+    USUARIOS_CACHE_TTL: int = 60
+    USUARIOS_CACHE_MAX_SIZE: int = 10000
+
+    # Límites de peticiones (token bucket) por ruta y por clave ("ip" o "email"),
+    # con el formato "N/periodo" (second, minute, hour o segundos). Sin RATE_LIMIT_URL
+    # (o CACHE_URL) los contadores son locales a cada worker
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_URL: Optional[str] = None
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMITS: Dict[str, Dict[str, str]] = {
+        "login": {"ip": "20/minute", "email": "5/minute"},
+        "usuarios_create": {"ip": "10/minute"},
+        "token_refresh": {"ip": "30/minute"},
+    }
+
 settings = Settings()
@@ -0,0 +1,99 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Optional, Tuple
+from fastapi import Request
+from src.shared.exceptions import BadRequestError, UnsupportedMediaTypeError
+
+# Cada fila se entrega como (número de fila, datos, error de lectura)
+Fila = Tuple[int, Optional[dict], Optional[str]]
+
+CSV_CAMPOS = ("nombre", "descripcion", "precio", "stock", "usuario_id")
+
+
+async def _lineas(request: Request) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        lineas = buffer.split("\n")
+        buffer = lineas.pop()
+        for linea in lineas:
+            yield linea.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def _filas_json(request: Request) -> AsyncIterator[Fila]:
+    try:
+        datos = json.loads(await request.body())
+    except ValueError:
+        raise BadRequestError("JSON inválido")
+    if not isinstance(datos, list):
+        raise BadRequestError("Se esperaba un array JSON de productos")
+    for fila, item in enumerate(datos, start=1):
+        if isinstance(item, dict):
+            yield fila, item, None
+        else:
+            yield fila, None, "Se esperaba un objeto"
+
+
+async def _filas_ndjson(request: Request) -> AsyncIterator[Fila]:
+    fila = 0
+    async for linea in _lineas(request):
+        if not linea.strip():
+            continue
+        fila += 1
+        try:
+            item = json.loads(linea)
+        except ValueError:
+            yield fila, None, "JSON inválido"
+            continue
+        if isinstance(item, dict):
+            yield fila, item, None
+        else:
+            yield fila, None, "Se esperaba un objeto"
+
+
+async def _filas_csv(request: Request) -> AsyncIterator[Fila]:
+    cabecera = None
+    registro = ""
+    fila = 0
+    async for linea in _lineas(request):
+        # Un campo entre comillas puede contener saltos de línea:
+        # el registro está completo cuando las comillas están balanceadas
+        registro = f"{registro}\n{linea}" if registro else linea
+        if registro.count('"') % 2:
+            continue
+        valores, registro = next(csv.reader([registro])), ""
+        if cabecera is None:
+            cabecera = [valor.strip() for valor in valores]
+            faltantes = {"nombre", "precio", "usuario_id"} - set(cabecera)
+            if faltantes:
+                raise BadRequestError(f"Faltan columnas en el CSV: {', '.join(sorted(faltantes))}")
+            continue
+        if not any(valores):
+            continue
+        fila += 1
+        if len(valores) != len(cabecera):
+            yield fila, None, "Número de columnas incorrecto"
+            continue
+        yield fila, {
+            campo: valor
+            for campo, valor in zip(cabecera, valores)
+            if campo in CSV_CAMPOS and valor != ""
+        }, None
+
+
+def parse_filas(request: Request) -> AsyncIterator[Fila]:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "application/json":
+        return _filas_json(request)
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return _filas_ndjson(request)
+    if content_type == "text/csv":
+        return _filas_csv(request)
+    raise UnsupportedMediaTypeError(
+        "Use application/json, application/x-ndjson o text/csv"
+    )
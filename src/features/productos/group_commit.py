@@ -0,0 +1,118 @@
+import asyncio
+import contextvars
+from typing import List, Optional, Set, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from src.config import settings
+from src.shared.database import AsyncSessionLocal
+from src.shared.exceptions import BadRequestError, ServiceUnavailableError
+from . import models, resumen, schemas
+
+
+# Group commit: las altas de producto de un worker se agrupan en una sola transacción
+# cada max_delay segundos o max_rows filas, lo que ocurra antes. Cada llamada recibe
+# su propia fila (con su id) o su propio error
+class ProductoGroupCommit:
+    def __init__(self, max_rows: int, max_delay: float):
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _bind_loop(self):
+        # El estado pertenece al bucle de eventos del worker que lo usa
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._pending = []
+            self._timer = None
+        return loop
+
+    def _spawn(self, coro) -> asyncio.Task:
+        # Contexto vacío: el lote no es de la petición que lo dispara, y con su contexto
+        # sus consultas se contarían en las métricas y el registro de consultas lentas de esta
+        task = self._loop.create_task(coro, context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def submit(self, producto: schemas.ProductoCreate) -> models.Producto:
+        future = self._bind_loop().create_future()
+        self._pending.append((producto.model_dump(), future))
+        if len(self._pending) >= self.max_rows:
+            self._spawn(self.flush())
+        elif self._timer is None:
+            self._timer = self._spawn(self._flush_after_delay())
+        return await future
+
+    async def _flush_after_delay(self):
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        if self._lock is None:
+            return
+        # Mientras se escribe un lote se acumula el siguiente
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[:self.max_rows]
+                self._pending = self._pending[self.max_rows:]
+                results = await self._write([values for values, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    if future.done():  # la petición se canceló mientras esperaba
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+    async def _commit(self, values: List[dict]) -> List[models.Producto]:
+        async with AsyncSessionLocal() as db:
+            # executemany con RETURNING en el orden de los parámetros: fila i -> llamada i
+            result = await db.scalars(
+                insert(models.Producto).returning(models.Producto, sort_by_parameter_order=True),
+                values
+            )
+            productos = result.all()
+            deltas: resumen.Deltas = {}
+            for producto in productos:
+                resumen.add_delta(deltas, producto.usuario_id, 1, producto.stock, producto.precio)
+            await resumen.apply_deltas(db, deltas)
+            await db.commit()
+            return productos
+
+    async def _write(self, values: List[dict]) -> list:
+        try:
+            return await self._commit(values)
+        except OperationalError:
+            return [_busy() for _ in values]
+        except SQLAlchemyError:
+            pass
+        # Si el lote falla, cada fila en su propia transacción para aislar el error
+        results = []
+        for i, row in enumerate(values):
+            try:
+                results.extend(await self._commit([row]))
+            except OperationalError:
+                # Las filas ya guardadas conservan su resultado: con un 503 el cliente
+                # reintentaría y duplicaría el producto
+                return results + [_busy() for _ in values[i:]]
+            except SQLAlchemyError:
+                results.append(BadRequestError("No se pudo guardar el producto"))
+        return results
+
+
+def _busy() -> ServiceUnavailableError:
+    # Bloqueo de la base agotado (busy_timeout en SQLite)
+    return ServiceUnavailableError("Base de datos ocupada, intente más tarde")
+
+
+producto_group_commit = ProductoGroupCommit(
+    max_rows=settings.PRODUCTOS_GROUP_COMMIT_MAX_ROWS,
+    max_delay=settings.PRODUCTOS_GROUP_COMMIT_MAX_DELAY_MS / 1000
+)
@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index, DDL, event, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from src.shared.database import Base
 
+# Expresión indexada para la búsqueda de texto completo en Postgres
+TSVECTOR_SQL = "to_tsvector('simple', coalesce(nombre, '') || ' ' || coalesce(descripcion, ''))"
+
 class Producto(Base):
     __tablename__ = "productos"
 
@@ -13,6 +16,94 @@ class Producto(Base):
     stock = Column(Integer, default=0)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
     fecha_creacion = Column(DateTime, default=datetime.utcnow)
+    # Versión de la fila: se actualiza en cada UPDATE (también en los de Core)
+    fecha_actualizacion = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     activo = Column(Boolean, default=True)
+    fecha_baja = Column(DateTime)
+
+    # raise_on_sql: acceder sin haberla cargado (selectinload/joinedload) es un error,
+    # no una consulta por fila
+    usuario = relationship("Usuario", back_populates="productos", lazy="raise_on_sql")
+
+    __table_args__ = (
+        # Índices parciales WHERE activo: las bajas no engordan los índices calientes
+        # Listado por vendedor: filtro usuario_id y orden/cursor por id
+        Index(
+            "ix_productos_usuario_activo", "usuario_id", "id",
+            sqlite_where=text("activo = 1"), postgresql_where=text("activo")
+        ),
+        # ETag del listado: count + max(fecha_actualizacion) sobre el índice
+        Index("ix_productos_usuario_actualizacion", "usuario_id", "fecha_actualizacion"),
+        # Búsqueda por rango de precio con cursor (precio, id)
+        Index(
+            "ix_productos_activo_precio", "precio", "id",
+            sqlite_where=text("activo = 1"), postgresql_where=text("activo")
+        ),
+        Index(
+            "ix_productos_busqueda", text(TSVECTOR_SQL),
+            postgresql_using="gin", postgresql_where=text("activo")
+        ).ddl_if(dialect="postgresql"),
+        # Solo para la purga de bajas antiguas
+        Index(
+            "ix_productos_baja", "fecha_baja",
+            sqlite_where=text("activo = 0"), postgresql_where=text("NOT activo")
+        ),
+    )
+
+# Productos dados de baja hace tiempo, movidos fuera de la tabla principal (sin FK:
+# su usuario también puede acabar archivado)
+class ProductoArchivo(Base):
+    __tablename__ = "productos_archivo"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(200), nullable=False)
+    descripcion = Column(String(500))
+    precio = Column(Float, nullable=False)
+    stock = Column(Integer)
+    usuario_id = Column(Integer, nullable=False, index=True)
+    fecha_creacion = Column(DateTime)
+    fecha_actualizacion = Column(DateTime)
+    fecha_baja = Column(DateTime)
+    fecha_archivo = Column(DateTime, default=datetime.utcnow)
+
+# Agregados de los productos activos de cada vendedor, actualizados en la misma
+# transacción que cada escritura (ver resumen.py). Sin FK, como los archivos: se
+# reparan con `python -m src.manage recompute-resumen`
+class ResumenUsuario(Base):
+    __tablename__ = "resumen_usuarios"
+
+    usuario_id = Column(Integer, primary_key=True)
+    productos = Column(Integer, nullable=False, default=0)
+    stock_total = Column(Integer, nullable=False, default=0)
+    valor_stock = Column(Float, nullable=False, default=0)
+    fecha_actualizacion = Column(DateTime, default=datetime.utcnow)
+
+# En SQLite la búsqueda usa una tabla FTS5 de contenido externo sincronizada por triggers
+FTS_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+        nombre, descripcion, content='productos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts(rowid, nombre, descripcion)
+        VALUES (new.id, new.nombre, new.descripcion);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, nombre, descripcion)
+        VALUES ('delete', old.id, old.nombre, old.descripcion);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF nombre, descripcion ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, nombre, descripcion)
+        VALUES ('delete', old.id, old.nombre, old.descripcion);
+        INSERT INTO productos_fts(rowid, nombre, descripcion)
+        VALUES (new.id, new.nombre, new.descripcion);
+    END""",
+]
 
-    usuario = relationship("Usuario", back_populates="productos")
+for statement in FTS_SQLITE_DDL:
+    event.listen(Producto.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Producto.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS productos_fts").execute_if(dialect="sqlite")
+)
@@ -0,0 +1,95 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import DateTime, delete, func, insert, literal, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+
+# Los dos dialectos soportados tienen el mismo INSERT ... ON CONFLICT DO UPDATE
+_UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# usuario_id -> [productos, stock_total, valor_stock] a sumar al resumen
+Deltas = Dict[int, List]
+
+
+def add_delta(deltas: Deltas, usuario_id: int, productos: int, stock: Optional[int], precio: float):
+    delta = deltas.setdefault(usuario_id, [0, 0, 0.0])
+    delta[0] += productos
+    delta[1] += stock or 0
+    delta[2] += (stock or 0) * precio
+
+
+# Un solo upsert por escritura sea cual sea el número de vendedores; en orden de
+# usuario_id para que transacciones concurrentes bloqueen las filas en el mismo orden
+def upsert_statement(dialect_name: str, deltas: Deltas):
+    resumen = models.ResumenUsuario
+    ahora = datetime.utcnow()
+    statement = _UPSERTS[dialect_name](resumen).values([
+        {
+            "usuario_id": usuario_id,
+            "productos": productos,
+            "stock_total": stock,
+            "valor_stock": valor,
+            "fecha_actualizacion": ahora,
+        }
+        for usuario_id, (productos, stock, valor) in sorted(deltas.items())
+    ])
+    return statement.on_conflict_do_update(
+        index_elements=[resumen.usuario_id],
+        set_={
+            "productos": resumen.productos + statement.excluded.productos,
+            "stock_total": resumen.stock_total + statement.excluded.stock_total,
+            "valor_stock": resumen.valor_stock + statement.excluded.valor_stock,
+            "fecha_actualizacion": statement.excluded.fecha_actualizacion,
+        }
+    )
+
+
+# Se ejecuta antes del commit de la escritura: resumen y productos cambian juntos
+async def apply_deltas(db: AsyncSession, deltas: Deltas):
+    if deltas:
+        await db.execute(upsert_statement(db.bind.dialect.name, deltas))
+
+
+def reset_statement(usuario_id: int):
+    # Baja del vendedor: todos sus productos activos pasan a inactivos
+    return (
+        update(models.ResumenUsuario)
+        .where(models.ResumenUsuario.usuario_id == usuario_id)
+        .values(productos=0, stock_total=0, valor_stock=0, fecha_actualizacion=datetime.utcnow())
+    )
+
+
+# Recalcula desde productos (todo o un vendedor) para reparar desviaciones
+async def recompute(db: AsyncSession, usuario_id: Optional[int] = None) -> int:
+    resumen = models.ResumenUsuario
+    producto = models.Producto
+    if db.bind.dialect.name == "postgresql":
+        # Las escrituras concurrentes esperan a que termine; en SQLite ya hay un solo escritor
+        await db.execute(text("LOCK TABLE resumen_usuarios IN EXCLUSIVE MODE"))
+
+    agregados = (
+        select(
+            producto.usuario_id,
+            func.count(),
+            func.coalesce(func.sum(producto.stock), 0),
+            func.coalesce(func.sum(producto.stock * producto.precio), 0.0),
+            literal(datetime.utcnow(), DateTime),
+        )
+        .where(producto.activo == True)
+        .group_by(producto.usuario_id)
+    )
+    borrado = delete(resumen)
+    if usuario_id is not None:
+        agregados = agregados.where(producto.usuario_id == usuario_id)
+        borrado = borrado.where(resumen.usuario_id == usuario_id)
+
+    await db.execute(borrado)
+    result = await db.execute(
+        insert(resumen).from_select(
+            ["usuario_id", "productos", "stock_total", "valor_stock", "fecha_actualizacion"],
+            agregados
+        )
+    )
+    await db.commit()
+    return result.rowcount
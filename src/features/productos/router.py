@@ -1,17 +1,143 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
-from src.shared.database import get_db
-from . import schemas, service
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from typing import Optional
+from src.config import settings
+from src.shared.database import get_async_db, get_read_db
+from src.shared.exceptions import BadRequestError
+from src.shared.responses import cache_headers, etag_matches, make_etag, not_modified, pydantic_response
+from . import bulk, schemas, service
+from ..usuarios import auth
+from ..usuarios.schemas import UsuarioCache
 
 router = APIRouter(prefix="/productos", tags=["productos"])
 
 @router.post("/", response_model=schemas.Producto, status_code=status.HTTP_201_CREATED)
-def create_producto(producto: schemas.ProductoCreate, db: Session = Depends(get_db)):
-    producto_service = service.ProductoService(db)
-    return producto_service.create(producto)
-
-@router.get("/usuario/{usuario_id}", response_model=List[schemas.Producto])
-def get_productos_usuario(usuario_id: int, db: Session = Depends(get_db)):
-    producto_service = service.ProductoService(db)
-    return producto_service.get_by_usuario(usuario_id)
+async def create_producto(producto: schemas.ProductoCreate, db: AsyncSession = Depends(get_async_db)):
+    producto_service = service.AsyncProductoService(db)
+    return pydantic_response(
+        schemas.Producto,
+        await producto_service.create(producto),
+        status_code=status.HTTP_201_CREATED
+    )
+
+def _parse_usuario_ids(value: str) -> list:
+    try:
+        ids = [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise BadRequestError("usuario_ids debe ser una lista de enteros separados por comas")
+    ids = list(dict.fromkeys(ids))  # sin duplicados, en el orden pedido
+    if not ids:
+        raise BadRequestError("usuario_ids no puede estar vacío")
+    if len(ids) > settings.PRODUCTOS_USUARIOS_MAX:
+        raise BadRequestError(f"Como máximo {settings.PRODUCTOS_USUARIOS_MAX} usuarios por petición")
+    return ids
+
+# Feed de varios vendedores en una petición: sustituye a una llamada por vendedor
+@router.get("/", response_model=schemas.ProductosPorUsuario)
+async def get_productos_usuarios(
+    usuario_ids: str = Query(..., description="ids de los vendedores separados por comas"),
+    limit: int = Query(settings.PRODUCTOS_PAGE_SIZE, ge=1, le=settings.PRODUCTOS_PAGE_SIZE_MAX,
+                       description="Productos por vendedor"),
+    incluir_usuario: bool = Query(False, description="Incluye id y nombre de cada vendedor"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    producto_service = service.AsyncProductoService(db)
+    grupos = await producto_service.get_by_usuarios(_parse_usuario_ids(usuario_ids), limit, incluir_usuario)
+    return pydantic_response(schemas.ProductosPorUsuario, {"usuarios": grupos})
+
+@router.post("/bulk", response_model=schemas.ProductoBulkResult)
+async def bulk_create_productos(request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Acepta un array JSON, NDJSON o CSV; NDJSON y CSV se leen en streaming
+    producto_service = service.AsyncProductoService(db)
+    return await producto_service.bulk_create(
+        bulk.parse_filas(request),
+        chunk_size=settings.PRODUCTOS_BULK_CHUNK_SIZE,
+        max_errores=settings.PRODUCTOS_BULK_MAX_ERRORES
+    )
+
+@router.get("/search", response_model=schemas.ProductoSearchPage)
+async def search_productos(
+    q: Optional[str] = Query(None, max_length=200, description="Texto a buscar en nombre y descripción"),
+    precio_min: Optional[float] = Query(None, ge=0),
+    precio_max: Optional[float] = Query(None, ge=0),
+    en_stock: bool = Query(False, description="Solo productos con stock"),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(settings.PRODUCTOS_PAGE_SIZE, ge=1, le=settings.PRODUCTOS_PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_async_db)
+):
+    producto_service = service.AsyncProductoService(db)
+    productos, next_cursor = await producto_service.search(
+        q, precio_min, precio_max, en_stock, cursor, limit
+    )
+    return pydantic_response(schemas.ProductoSearchPage, {"items": productos, "next_cursor": next_cursor})
+
+@router.post("/reservar", response_model=schemas.ReservaLoteResponse)
+async def reservar_lote(reserva: schemas.ReservaLoteRequest, db: AsyncSession = Depends(get_async_db)):
+    producto_service = service.AsyncProductoService(db)
+    items = await producto_service.reservar_lote(
+        (item.producto_id, item.cantidad) for item in reserva.items
+    )
+    return {"items": items}
+
+@router.post("/{producto_id}/reservar", response_model=schemas.ReservaResponse)
+async def reservar_producto(
+    producto_id: int,
+    reserva: schemas.ReservaRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    producto_service = service.AsyncProductoService(db)
+    return await producto_service.reservar(producto_id, reserva.cantidad)
+
+# Baja lógica; solo el propietario (con su token de acceso)
+@router.delete("/{producto_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_producto(
+    producto_id: int,
+    usuario: UsuarioCache = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    producto_service = service.AsyncProductoService(db)
+    await producto_service.deactivate(producto_id, usuario.id)
+
+async def _stream_productos_ndjson(usuario_id: int, bind: AsyncEngine):
+    # La sesión de la dependencia se cierra antes de enviar la respuesta, así que el
+    # streaming abre la suya propia contra la misma base (primario o réplica)
+    async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+        producto_service = service.AsyncProductoService(db)
+        async for productos in producto_service.stream_by_usuario(
+            usuario_id, settings.PRODUCTOS_STREAM_BATCH_SIZE
+        ):
+            yield "".join(
+                schemas.Producto.model_validate(producto).model_dump_json() + "\n"
+                for producto in productos
+            )
+
+@router.get("/usuario/{usuario_id}", response_model=schemas.ProductoPage)
+async def get_productos_usuario(
+    usuario_id: int,
+    request: Request,
+    cursor: Optional[int] = Query(None, description="id del último producto de la página anterior"),
+    limit: int = Query(settings.PRODUCTOS_PAGE_SIZE, ge=1, le=settings.PRODUCTOS_PAGE_SIZE_MAX),
+    stream: bool = Query(False, description="Devuelve todos los productos como NDJSON"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    producto_service = service.AsyncProductoService(db)
+    # Un sondeo sin cambios cuesta una consulta agregada y no serializa nada
+    total, version = await producto_service.get_version_by_usuario(usuario_id)
+    etag = make_etag("productos", usuario_id, total, version, cursor, limit, stream)
+    if total and etag_matches(request, etag):
+        return not_modified(etag)
+
+    if stream:
+        return StreamingResponse(
+            _stream_productos_ndjson(usuario_id, db.bind),
+            media_type="application/x-ndjson",
+            headers=cache_headers(etag)
+        )
+
+    productos, next_cursor = await producto_service.get_by_usuario(usuario_id, cursor, limit)
+    return pydantic_response(
+        schemas.ProductoPage,
+        {"items": productos, "next_cursor": next_cursor},
+        headers=cache_headers(etag)
+    )
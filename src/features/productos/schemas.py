@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class ProductoBase(BaseModel):
     nombre: str = Field(..., min_length=1, max_length=200)
@@ -19,3 +19,72 @@ class Producto(ProductoBase):
 
     class Config:
         from_attributes = True
+
+
+class ProductoPage(BaseModel):
+    items: List[Producto]
+    next_cursor: Optional[int] = None
+
+
+# Listado de varios vendedores en una sola petición, agrupado por propietario
+class Propietario(BaseModel):
+    id: int
+    nombre: str
+
+    class Config:
+        from_attributes = True
+
+class ProductosDeUsuario(BaseModel):
+    usuario_id: int
+    usuario: Optional[Propietario] = None
+    items: List[Producto]
+    # Para seguir con GET /productos/usuario/{usuario_id}?cursor=...
+    next_cursor: Optional[int] = None
+
+class ProductosPorUsuario(BaseModel):
+    usuarios: List[ProductosDeUsuario]
+
+
+# Agregados de los productos activos de un vendedor (tabla resumen_usuarios)
+class ResumenUsuario(BaseModel):
+    usuario_id: int
+    productos: int = 0
+    stock_total: int = 0
+    valor_stock: float = 0
+    fecha_actualizacion: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProductoBulkError(BaseModel):
+    fila: int
+    error: str
+
+class ProductoBulkResult(BaseModel):
+    insertados: int
+    total_errores: int
+    errores: List[ProductoBulkError]
+
+
+class ProductoSearchPage(BaseModel):
+    items: List[Producto]
+    next_cursor: Optional[str] = None
+
+
+class ReservaRequest(BaseModel):
+    cantidad: int = Field(..., gt=0)
+
+class ReservaItem(ReservaRequest):
+    producto_id: int
+
+class ReservaLoteRequest(BaseModel):
+    items: List[ReservaItem] = Field(..., min_length=1)
+
+class ReservaResponse(BaseModel):
+    producto_id: int
+    cantidad: int
+    stock_restante: int
+
+class ReservaLoteResponse(BaseModel):
+    items: List[ReservaResponse]
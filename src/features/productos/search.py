@@ -0,0 +1,103 @@
+import base64
+import json
+import math
+import re
+from typing import Any, List, Optional
+from sqlalchemy import Column, Float, Integer, MetaData, Table, func, literal_column, select, tuple_
+from src.shared.exceptions import BadRequestError
+from . import models
+
+# Tabla virtual FTS5 (SQLite); fuera de Base.metadata porque la crean DDL propios
+productos_fts = Table("productos_fts", MetaData(), Column("rowid", Integer))
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise BadRequestError("Cursor inválido")
+    if not isinstance(values, list) or len(values) != 2:
+        raise BadRequestError("Cursor inválido")
+    # [clave de orden, id]: el cursor viene del cliente, así que se validan los tipos
+    sort_key, producto_id = values
+    if (
+        isinstance(sort_key, bool) or not isinstance(sort_key, (int, float)) or not math.isfinite(sort_key)
+        or isinstance(producto_id, bool) or not isinstance(producto_id, int)
+    ):
+        raise BadRequestError("Cursor inválido")
+    return values
+
+
+def _fts5_match(q: str) -> Optional[str]:
+    # Cada palabra entre comillas (sin sintaxis FTS del usuario) y con prefijo: "mes"* encuentra "mesa"
+    tokens = _TOKEN.findall(q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def text_match(dialect: str, q: str) -> Optional[str]:
+    # Expresión de búsqueda de `q`, o None si no tiene términos buscables ("!!!", espacios)
+    if dialect == "sqlite":
+        return _fts5_match(q)
+    return q.strip() if _TOKEN.search(q) else None
+
+
+def build_search_query(
+    dialect: str,
+    q: Optional[str],
+    precio_min: Optional[float],
+    precio_max: Optional[float],
+    en_stock: bool,
+    cursor: Optional[List[Any]]
+):
+    Producto = models.Producto
+    match = text_match(dialect, q) if q is not None else None
+
+    if match is None and cursor is not None:
+        # Una sola cota inferior de precio para que el índice empiece en la página pedida
+        precio_min = cursor[0] if precio_min is None else max(precio_min, cursor[0])
+
+    filters = [Producto.activo == True]
+    if precio_min is not None:
+        filters.append(Producto.precio >= precio_min)
+    if precio_max is not None:
+        filters.append(Producto.precio <= precio_max)
+    if en_stock:
+        filters.append(Producto.stock > 0)
+
+    if match is None:
+        # Sin texto: orden por (precio, id), servido por ix_productos_activo_precio
+        sort_key = Producto.precio
+        query = select(Producto, sort_key.label("sort_key"))
+    elif dialect == "sqlite":
+        # bm25 devuelve valores más bajos para los mejores resultados
+        sort_key = literal_column("bm25(productos_fts)", Float)
+        query = (
+            select(Producto, sort_key.label("sort_key"))
+            .join(productos_fts, productos_fts.c.rowid == Producto.id)
+            .where(literal_column("productos_fts").op("MATCH")(match))
+        )
+    else:
+        # Misma expresión que ix_productos_busqueda para que Postgres use el índice GIN
+        simple = literal_column("'simple'")
+        tsvector = func.to_tsvector(
+            simple,
+            func.coalesce(Producto.nombre, literal_column("''"))
+            .op("||")(literal_column("' '"))
+            .op("||")(func.coalesce(Producto.descripcion, literal_column("''")))
+        )
+        tsquery = func.plainto_tsquery(simple, match)
+        # ts_rank negado para ordenar de forma ascendente como bm25
+        sort_key = -func.ts_rank(tsvector, tsquery)
+        query = select(Producto, sort_key.label("sort_key")).where(tsvector.op("@@")(tsquery))
+
+    if cursor is not None:
+        filters.append(tuple_(sort_key, Producto.id) > tuple_(*cursor))
+    return query.where(*filters).order_by(sort_key, Producto.id)
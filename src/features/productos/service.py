@@ -1,31 +1,360 @@
-from sqlalchemy.orm import Session
-from src.shared.exceptions import NotFoundError
-from . import models, schemas
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from src.config import settings
+from src.shared.archive import archive_in_batches
+from src.shared.exceptions import ConflictError, NotFoundError, ServiceUnavailableError
+from . import models, resumen, schemas
+from .bulk import Fila
+from .group_commit import producto_group_commit
+from .search import build_search_query, decode_cursor, encode_cursor, text_match
 from ..usuarios.models import Usuario
-from typing import List
+from ..usuarios.service import AsyncUsuarioService
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
-class ProductoService:
-    def __init__(self, db: Session):
+class AsyncProductoService:
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create(self, producto: schemas.ProductoCreate) -> models.Producto:
-        if not self.db.query(Usuario).filter(
-            Usuario.id == producto.usuario_id,
-            Usuario.activo == True
-        ).first():
-            raise NotFoundError("Usuario no encontrado")
+    async def create(self, producto: schemas.ProductoCreate) -> models.Producto:
+        # Lanza NotFoundError si el usuario no existe; normalmente se resuelve en la caché
+        await AsyncUsuarioService(self.db).get_by_id(producto.usuario_id)
+
+        if settings.PRODUCTOS_GROUP_COMMIT:
+            # Devolver la conexión al pool antes de esperar: el lote usa la suya y,
+            # con todas retenidas por peticiones en espera, nunca llegaría a escribirse
+            await self.db.commit()
+            return await producto_group_commit.submit(producto)
 
         db_producto = models.Producto(**producto.model_dump())
         self.db.add(db_producto)
-        self.db.commit()
-        self.db.refresh(db_producto)
+        deltas: resumen.Deltas = {}
+        resumen.add_delta(deltas, producto.usuario_id, 1, producto.stock, producto.precio)
+        await resumen.apply_deltas(self.db, deltas)
+        await self.db.commit()
+        await self.db.refresh(db_producto)
         return db_producto
 
-    def get_by_usuario(self, usuario_id: int) -> List[models.Producto]:
-        productos = self.db.query(models.Producto).filter(
+    def _query_by_usuario(self, usuario_id: int):
+        return select(models.Producto).where(
             models.Producto.usuario_id == usuario_id,
             models.Producto.activo == True
-        ).all()
-        if not productos:
+        ).order_by(models.Producto.id)
+
+    async def get_version_by_usuario(self, usuario_id: int) -> Tuple[int, Optional[datetime]]:
+        # Versión del listado para el ETag: incluye los inactivos para que una baja también
+        # la cambie; se resuelve solo con el índice (usuario_id, fecha_actualizacion)
+        result = await self.db.execute(
+            select(func.count(), func.max(models.Producto.fecha_actualizacion))
+            .where(models.Producto.usuario_id == usuario_id)
+        )
+        total, version = result.one()
+        return total, version
+
+    async def get_resumen(self, usuario_id: int):
+        # Lanza NotFoundError si el usuario no existe; normalmente se resuelve en la caché
+        await AsyncUsuarioService(self.db).get_by_id(usuario_id)
+        # Una lectura por clave primaria, sin recorrer los productos
+        fila = await self.db.get(models.ResumenUsuario, usuario_id)
+        # Sin fila: el vendedor todavía no ha tenido productos
+        return fila or {"usuario_id": usuario_id}
+
+    async def get_by_usuario(
+        self,
+        usuario_id: int,
+        cursor: Optional[int] = None,
+        limit: int = 50
+    ) -> Tuple[List[models.Producto], Optional[int]]:
+        # Paginación por clave: id > cursor, se pide un elemento extra para saber si hay más
+        query = self._query_by_usuario(usuario_id)
+        if cursor is not None:
+            query = query.where(models.Producto.id > cursor)
+        result = await self.db.scalars(query.limit(limit + 1))
+        productos = result.all()
+        if not productos and cursor is None:
             raise NotFoundError(f"No se encontraron productos para el usuario {usuario_id}")
-        return productos
+
+        next_cursor = None
+        if len(productos) > limit:
+            productos = productos[:limit]
+            next_cursor = productos[-1].id
+        return productos, next_cursor
+
+    async def get_by_usuarios(
+        self,
+        usuario_ids: List[int],
+        limit: int = 50,
+        incluir_usuario: bool = False
+    ) -> List[dict]:
+        # Una sola consulta IN para todos los vendedores, con como mucho limit + 1
+        # productos por vendedor (row_number por usuario_id) para calcular su cursor
+        numerados = select(
+            models.Producto,
+            func.row_number().over(
+                partition_by=models.Producto.usuario_id,
+                order_by=models.Producto.id
+            ).label("posicion")
+        ).where(
+            models.Producto.usuario_id.in_(usuario_ids),
+            models.Producto.activo == True
+        ).subquery()
+        producto = aliased(models.Producto, numerados)
+        result = await self.db.scalars(
+            select(producto)
+            .where(numerados.c.posicion <= limit + 1)
+            .order_by(numerados.c.usuario_id, numerados.c.id)
+        )
+        por_usuario: Dict[int, List[models.Producto]] = {usuario_id: [] for usuario_id in usuario_ids}
+        for p in result.all():
+            por_usuario[p.usuario_id].append(p)
+
+        # Resumen de los propietarios con una segunda consulta IN, no una por producto
+        propietarios: Dict[int, Usuario] = {}
+        if incluir_usuario:
+            result = await self.db.scalars(
+                select(Usuario).where(Usuario.id.in_(usuario_ids), Usuario.activo == True)
+            )
+            propietarios = {usuario.id: usuario for usuario in result.all()}
+
+        grupos = []
+        for usuario_id, productos in por_usuario.items():
+            next_cursor = None
+            if len(productos) > limit:
+                productos = productos[:limit]
+                next_cursor = productos[-1].id
+            grupos.append({
+                "usuario_id": usuario_id,
+                "usuario": propietarios.get(usuario_id),
+                "items": productos,
+                "next_cursor": next_cursor,
+            })
+        return grupos
+
+    async def stream_by_usuario(
+        self,
+        usuario_id: int,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[models.Producto]]:
+        # yield_per usa cursores del lado del servidor: la memoria no depende del tamaño del catálogo
+        result = await self.db.stream_scalars(
+            self._query_by_usuario(usuario_id).execution_options(yield_per=batch_size)
+        )
+        async for productos in result.partitions():
+            yield productos
+
+    async def _decrement_stock(self, producto_id: int, cantidad: int):
+        # Una sola sentencia condicional: no hay lectura previa que pueda quedar obsoleta
+        result = await self.db.execute(
+            update(models.Producto)
+            .where(
+                models.Producto.id == producto_id,
+                models.Producto.activo == True,
+                models.Producto.stock >= cantidad
+            )
+            .values(stock=models.Producto.stock - cantidad)
+            .returning(models.Producto.stock, models.Producto.usuario_id, models.Producto.precio)
+            .execution_options(synchronize_session=False)
+        )
+        # (stock restante, usuario_id, precio) o None si no se pudo reservar
+        return result.one_or_none()
+
+    async def _stock_disponible(self, producto_ids: Iterable[int]) -> Dict[int, int]:
+        result = await self.db.execute(
+            select(models.Producto.id, models.Producto.stock).where(
+                models.Producto.id.in_(producto_ids),
+                models.Producto.activo == True
+            )
+        )
+        return dict(result.all())
+
+    async def reservar(self, producto_id: int, cantidad: int) -> dict:
+        return (await self.reservar_lote([(producto_id, cantidad)]))[0]
+
+    async def reservar_lote(self, items: Iterable[Tuple[int, int]]) -> List[dict]:
+        # Todo o nada. Se agrupan ids repetidos y se actualiza en orden de id
+        # para que transacciones concurrentes bloqueen las filas en el mismo orden
+        cantidades: Dict[int, int] = {}
+        for producto_id, cantidad in items:
+            cantidades[producto_id] = cantidades.get(producto_id, 0) + cantidad
+
+        reservados = []
+        fallidos = []
+        deltas: resumen.Deltas = {}
+        try:
+            for producto_id in sorted(cantidades):
+                fila = await self._decrement_stock(producto_id, cantidades[producto_id])
+                if fila is None:
+                    fallidos.append(producto_id)
+                else:
+                    stock, usuario_id, precio = fila
+                    resumen.add_delta(deltas, usuario_id, 0, -cantidades[producto_id], precio)
+                    reservados.append({
+                        "producto_id": producto_id,
+                        "cantidad": cantidades[producto_id],
+                        "stock_restante": stock
+                    })
+
+            if fallidos:
+                await self.db.rollback()
+                disponibles = await self._stock_disponible(fallidos)
+                no_encontrados = [pid for pid in fallidos if pid not in disponibles]
+                if no_encontrados and len(cantidades) == 1:
+                    raise NotFoundError("Producto no encontrado")
+                # Sin reintentos en el servidor: el cliente decide con el stock actual
+                raise ConflictError({
+                    "mensaje": "Stock insuficiente",
+                    "conflictos": [
+                        {
+                            "producto_id": pid,
+                            "solicitado": cantidades[pid],
+                            "disponible": disponibles.get(pid),
+                        }
+                        for pid in fallidos
+                    ]
+                })
+            await resumen.apply_deltas(self.db, deltas)
+            await self.db.commit()
+        except OperationalError:
+            # Bloqueo de la base agotado (busy_timeout en SQLite)
+            await self.db.rollback()
+            raise ServiceUnavailableError("Base de datos ocupada, intente más tarde")
+        return reservados
+
+    async def deactivate(self, producto_id: int, usuario_id: int):
+        # Solo el propietario; un producto ajeno se trata como inexistente
+        result = await self.db.execute(
+            update(models.Producto)
+            .where(
+                models.Producto.id == producto_id,
+                models.Producto.usuario_id == usuario_id,
+                models.Producto.activo == True
+            )
+            .values(activo=False, fecha_baja=datetime.utcnow())
+            .returning(models.Producto.stock, models.Producto.precio)
+            .execution_options(synchronize_session=False)
+        )
+        fila = result.one_or_none()
+        if fila is None:
+            raise NotFoundError("Producto no encontrado")
+        deltas: resumen.Deltas = {}
+        resumen.add_delta(deltas, usuario_id, -1, -(fila.stock or 0), fila.precio)
+        await resumen.apply_deltas(self.db, deltas)
+        await self.db.commit()
+
+    async def purge_inactive(self, cutoff: datetime, batch_size: int = 1000, pause: float = 0.0) -> int:
+        return await archive_in_batches(
+            self.db,
+            models.Producto,
+            models.ProductoArchivo,
+            [models.Producto.activo == False, models.Producto.fecha_baja < cutoff],
+            batch_size=batch_size,
+            pause=pause
+        )
+
+    async def search(
+        self,
+        q: Optional[str] = None,
+        precio_min: Optional[float] = None,
+        precio_max: Optional[float] = None,
+        en_stock: bool = False,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[models.Producto], Optional[str]]:
+        # Con texto: ordenado por relevancia; sin texto: por precio. Cursor opaco (orden, id)
+        dialect = self.db.bind.dialect.name
+        decoded = decode_cursor(cursor) if cursor else None
+        if q is not None and text_match(dialect, q) is None:
+            # Texto sin términos buscables: ninguna coincidencia, no el listado completo
+            return [], None
+        query = build_search_query(
+            dialect,
+            q,
+            precio_min,
+            precio_max,
+            en_stock,
+            decoded
+        )
+        rows = (await self.db.execute(query.limit(limit + 1))).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            producto, sort_key = rows[-1]
+            next_cursor = encode_cursor([sort_key, producto.id])
+        return [producto for producto, _ in rows], next_cursor
+
+    async def bulk_create(
+        self,
+        filas: AsyncIterator[Fila],
+        chunk_size: int = 1000,
+        max_errores: int = 1000
+    ) -> dict:
+        insertados = 0
+        errores: List[dict] = []
+        total_errores = 0
+
+        def registrar_error(fila: int, error: str):
+            nonlocal total_errores
+            total_errores += 1
+            if len(errores) < max_errores:
+                errores.append({"fila": fila, "error": error})
+
+        lote: List[Tuple[int, schemas.ProductoCreate]] = []
+        async for fila, datos, error in filas:
+            if error:
+                registrar_error(fila, error)
+                continue
+            try:
+                lote.append((fila, schemas.ProductoCreate.model_validate(datos)))
+            except ValidationError as exc:
+                registrar_error(fila, "; ".join(
+                    f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}" for e in exc.errors()
+                ))
+                continue
+            if len(lote) >= chunk_size:
+                insertados += await self._insert_chunk(lote, registrar_error)
+                lote = []
+        if lote:
+            insertados += await self._insert_chunk(lote, registrar_error)
+
+        errores.sort(key=lambda e: e["fila"])
+        return {"insertados": insertados, "total_errores": total_errores, "errores": errores}
+
+    async def _insert_chunk(self, lote: Iterable[Tuple[int, schemas.ProductoCreate]], registrar_error) -> int:
+        # Una sola consulta valida todos los propietarios del lote
+        usuario_ids = {producto.usuario_id for _, producto in lote}
+        result = await self.db.scalars(
+            select(Usuario.id).where(
+                Usuario.id.in_(usuario_ids),
+                Usuario.activo == True
+            )
+        )
+        existentes = set(result.all())
+
+        valores = []
+        filas = []
+        deltas: resumen.Deltas = {}
+        for fila, producto in lote:
+            if producto.usuario_id not in existentes:
+                registrar_error(fila, "Usuario no encontrado")
+                continue
+            valores.append(producto.model_dump())
+            filas.append(fila)
+            resumen.add_delta(deltas, producto.usuario_id, 1, producto.stock, producto.precio)
+        if not valores:
+            return 0
+
+        # executemany dentro de una transacción por lote
+        try:
+            await self.db.execute(insert(models.Producto), valores)
+            await resumen.apply_deltas(self.db, deltas)
+            await self.db.commit()
+        except SQLAlchemyError:
+            await self.db.rollback()
+            for fila in filas:
+                registrar_error(fila, "Error al guardar el lote")
+            return 0
+        return len(valores)
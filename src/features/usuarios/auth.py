@@ -0,0 +1,102 @@
+import time
+import uuid
+from typing import Optional
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import settings
+from src.shared.cache import build_cache
+from src.shared.database import get_async_db
+from src.shared.exceptions import NotFoundError, UnauthorizedError
+from . import schemas
+from .service import AsyncUsuarioService
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+# Lista de revocación acotada: cada entrada caduca cuando caducaría su token
+revoked_tokens = build_cache(
+    "tokens_revocados",
+    ttl=settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+    max_size=settings.TOKEN_REVOCATION_MAX_SIZE
+)
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def _create_token(usuario_id: int, token_type: str, expires_in: int) -> str:
+    now = int(time.time())
+    payload = {
+        "sub": str(usuario_id),
+        "type": token_type,
+        "iat": now,
+        "exp": now + expires_in,
+        "jti": uuid.uuid4().hex,
+    }
+    # python-jose se importa en el primer uso para no pagarlo al arrancar
+    from jose import jwt
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+def create_tokens(usuario_id: int) -> dict:
+    expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    return {
+        "access_token": _create_token(usuario_id, ACCESS, expires_in),
+        "refresh_token": _create_token(
+            usuario_id, REFRESH, settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        ),
+        "token_type": "bearer",
+        "expires_in": expires_in,
+    }
+
+
+def decode_token(token: str, token_type: str) -> dict:
+    # Solo verifica firma y expiración: no toca la base de datos
+    from jose import JWTError, jwt
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        raise UnauthorizedError("Token inválido o expirado")
+    if payload.get("type") != token_type or "sub" not in payload or "jti" not in payload:
+        raise UnauthorizedError("Token inválido o expirado")
+    return payload
+
+
+async def revoke_token(payload: dict):
+    remaining = int(payload["exp"] - time.time())
+    if remaining > 0:
+        await revoked_tokens.set(payload["jti"], True, ttl=remaining)
+
+
+async def _check_not_revoked(payload: dict):
+    if await revoked_tokens.get(payload["jti"]) is not None:
+        raise UnauthorizedError("Token revocado")
+
+
+async def refresh_tokens(refresh_token: str) -> dict:
+    # Rotación: el refresh token usado queda revocado
+    payload = decode_token(refresh_token, REFRESH)
+    await _check_not_revoked(payload)
+    await revoke_token(payload)
+    return create_tokens(int(payload["sub"]))
+
+
+async def get_token_payload(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> dict:
+    if credentials is None:
+        raise UnauthorizedError("Token requerido")
+    payload = decode_token(credentials.credentials, ACCESS)
+    await _check_not_revoked(payload)
+    return payload
+
+
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db)
+) -> schemas.UsuarioCache:
+    # La sesión no abre conexión si el usuario está en la caché
+    try:
+        return await AsyncUsuarioService(db).get_by_id(int(payload["sub"]))
+    except NotFoundError:
+        raise UnauthorizedError("Usuario no válido")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from src.shared.database import Base
@@ -8,9 +8,40 @@ class Usuario(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(100), nullable=False)
-    email = Column(String(100), unique=True, nullable=False, index=True)
+    # Único solo entre los activos: una cuenta dada de baja no bloquea su email
+    email = Column(String(100), nullable=False)
     password = Column(String(255), nullable=False)
     fecha_registro = Column(DateTime, default=datetime.utcnow)
+    fecha_actualizacion = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     activo = Column(Boolean, default=True)
+    fecha_baja = Column(DateTime)
 
-    productos = relationship("Producto", back_populates="usuario", cascade="all, delete-orphan")
+    # Sin cascada del ORM: la baja desactiva los productos con un único UPDATE
+    productos = relationship("Producto", back_populates="usuario", lazy="raise_on_sql")
+
+    __table_args__ = (
+        # Índices parciales: las filas inactivas no ocupan los índices de las consultas habituales
+        Index(
+            "ix_usuarios_email_activo", "email", unique=True,
+            sqlite_where=text("activo = 1"), postgresql_where=text("activo")
+        ),
+        # Solo para la purga de bajas antiguas
+        Index(
+            "ix_usuarios_baja", "fecha_baja",
+            sqlite_where=text("activo = 0"), postgresql_where=text("NOT activo")
+        ),
+    )
+
+
+# Usuarios dados de baja hace tiempo, movidos fuera de la tabla principal
+class UsuarioArchivo(Base):
+    __tablename__ = "usuarios_archivo"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(100), nullable=False)
+    email = Column(String(100), nullable=False)
+    password = Column(String(255), nullable=False)
+    fecha_registro = Column(DateTime)
+    fecha_actualizacion = Column(DateTime)
+    fecha_baja = Column(DateTime)
+    fecha_archivo = Column(DateTime, default=datetime.utcnow)
@@ -1,23 +1,92 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from src.shared.database import get_db
-from . import schemas, service
+from fastapi import APIRouter, BackgroundTasks, Depends, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.shared.database import get_async_db, get_read_db
+from src.shared.exceptions import ForbiddenError, NotFoundError
+from src.shared.rate_limit import rate_limit
+from src.shared.responses import cache_headers, etag_matches, make_etag, not_modified, pydantic_response
+from . import auth, schemas, service
+from ..productos import schemas as productos_schemas, service as productos_service
 from typing import List
 
 router = APIRouter(prefix="/usuarios", tags=["usuarios"])
 
-@router.post("/", response_model=schemas.Usuario, status_code=status.HTTP_201_CREATED)
-def create_usuario(usuario: schemas.UsuarioCreate, db: Session = Depends(get_db)):
-    usuario_service = service.UsuarioService(db)
-    return usuario_service.create(usuario)
+@router.post(
+    "/",
+    response_model=schemas.Usuario,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("usuarios_create"))]
+)
+async def create_usuario(usuario: schemas.UsuarioCreate, db: AsyncSession = Depends(get_async_db)):
+    usuario_service = service.AsyncUsuarioService(db)
+    return await usuario_service.create(usuario)
+
+# Debe declararse antes de /{usuario_email}
+@router.get("/me", response_model=schemas.Usuario)
+async def get_me(usuario: schemas.UsuarioCache = Depends(auth.get_current_user)):
+    return usuario
 
 @router.get("/{usuario_email}", response_model=schemas.Usuario)
-def get_usuario(usuario_email: str, db: Session = Depends(get_db)):
-    usuario_service = service.UsuarioService(db)
-    return usuario_service.get_by_email(usuario_email)
+async def get_usuario(usuario_email: str, request: Request, db: AsyncSession = Depends(get_read_db)):
+    usuario_service = service.AsyncUsuarioService(db)
+    # La versión sale de la copia en caché: un sondeo sin cambios no toca la base de datos
+    usuario = await usuario_service.get_by_email(usuario_email)
+    if usuario is None:
+        raise NotFoundError("Usuario no encontrado")
+    etag = make_etag("usuario", usuario.id, usuario.fecha_actualizacion or usuario.fecha_registro)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return pydantic_response(schemas.Usuario, usuario, headers=cache_headers(etag))
+
+# Agregados del catálogo del vendedor: una lectura por clave, no depende del número de productos
+@router.get("/{usuario_id}/resumen", response_model=productos_schemas.ResumenUsuario)
+async def get_resumen_usuario(usuario_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    producto_service = productos_service.AsyncProductoService(db)
+    resumen = productos_schemas.ResumenUsuario.model_validate(await producto_service.get_resumen(usuario_id))
+    etag = make_etag("resumen", usuario_id, resumen.productos, resumen.stock_total, resumen.valor_stock)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return pydantic_response(productos_schemas.ResumenUsuario, resumen, headers=cache_headers(etag))
+
+# Baja lógica de la propia cuenta; sus productos se desactivan con ella
+@router.delete("/{usuario_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_usuario(
+    usuario_id: int,
+    usuario: schemas.UsuarioCache = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if usuario.id != usuario_id:
+        raise ForbiddenError("Solo puede dar de baja su propia cuenta")
+    usuario_service = service.AsyncUsuarioService(db)
+    await usuario_service.deactivate(usuario_id)
+
+
+@router.post(
+    "/login",
+    response_model=schemas.LoginResponse,
+    dependencies=[Depends(rate_limit("login"))]
+)
+async def login(
+    credentials: schemas.LoginRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    usuario_service = service.AsyncUsuarioService(db)
+    usuario = await usuario_service.login(credentials.email, credentials.password)
+    old_hash, new_hash = usuario.pop("old_hash"), usuario.pop("new_hash")
+    if new_hash:
+        background_tasks.add_task(service.update_password_hash, usuario["id"], old_hash, new_hash)
+    return {**usuario, **auth.create_tokens(usuario["id"])}
 
+@router.post(
+    "/token/refresh",
+    response_model=schemas.TokenResponse,
+    dependencies=[Depends(rate_limit("token_refresh"))]
+)
+async def refresh_token(body: schemas.RefreshRequest):
+    return await auth.refresh_tokens(body.refresh_token)
 
-@router.post("/login", response_model=schemas.LoginResponse)
-def login(credentials: schemas.LoginRequest, db: Session = Depends(get_db)):
-    usuario_service = service.UsuarioService(db)
-    return usuario_service.login(credentials.email, credentials.password)
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(body: schemas.LogoutRequest, payload: dict = Depends(auth.get_token_payload)):
+    await auth.revoke_token(payload)
+    if body.refresh_token:
+        await auth.revoke_token(auth.decode_token(body.refresh_token, auth.REFRESH))
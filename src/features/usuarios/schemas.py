@@ -17,11 +17,29 @@ class Usuario(UsuarioBase):
     class Config:
         from_attributes = True
 
+# Copia del usuario guardada en la caché (incluye el hash para el login)
+class UsuarioCache(Usuario):
+    password: str
+    # Versión para el ETag; opcional para aceptar copias guardadas antes de existir
+    fecha_actualizacion: Optional[datetime] = None
+
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
 
-class LoginResponse(BaseModel):
+class TokenResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+class LoginResponse(TokenResponse):
     email: str
     nombre: str
-    success: bool
\ No newline at end of file
+    success: bool
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
\ No newline at end of file
@@ -1,64 +1,159 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy import exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.shared.exceptions import NotFoundError, BadRequestError
 from . import models, schemas
-from passlib.context import CryptContext
+from ..productos import resumen
+from ..productos.models import Producto
+from src.shared.archive import archive_in_batches
+from src.shared.cache import build_cache
+from src.shared.database import AsyncSessionLocal
+from src.shared.hashing import password_hasher
+from src.config import settings
 from typing import Optional
 from fastapi import HTTPException, status
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+usuarios_cache = build_cache(
+    "usuarios",
+    ttl=settings.USUARIOS_CACHE_TTL,
+    max_size=settings.USUARIOS_CACHE_MAX_SIZE
+)
 
-class UsuarioService:
-    def __init__(self, db: Session):
+async def cache_usuario(usuario: models.Usuario) -> schemas.UsuarioCache:
+    cached = schemas.UsuarioCache.model_validate(usuario)
+    data = cached.model_dump(mode="json")
+    await usuarios_cache.set(f"email:{cached.email}", data)
+    await usuarios_cache.set(f"id:{cached.id}", data)
+    return cached
+
+async def invalidate_usuario(usuario_id: int, email: str):
+    await usuarios_cache.delete(f"email:{email}", f"id:{usuario_id}")
+
+async def update_password_hash(usuario_id: int, old_hash: str, new_hash: str):
+    # Tarea en segundo plano con su propia sesión; no pisa un cambio de contraseña concurrente
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(models.Usuario)
+            .where(models.Usuario.id == usuario_id, models.Usuario.password == old_hash)
+            .values(password=new_hash)
+            .returning(models.Usuario.email)
+        )
+        email = result.scalar()
+        await db.commit()
+    if email:
+        await invalidate_usuario(usuario_id, email)
+
+
+class AsyncUsuarioService:
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create(self, usuario: schemas.UsuarioCreate) -> models.Usuario:
-        if self.get_by_email(usuario.email):
+    async def create(self, usuario: schemas.UsuarioCreate) -> models.Usuario:
+        if await self.get_by_email(usuario.email):
             raise BadRequestError("Email ya registrado")
-        
-        hashed_password = pwd_context.hash(usuario.password)
+
+        hashed_password = await password_hasher.hash(usuario.password)
         db_usuario = models.Usuario(
             nombre=usuario.nombre,
             email=usuario.email,
             password=hashed_password
         )
         self.db.add(db_usuario)
-        self.db.commit()
-        self.db.refresh(db_usuario)
+        await self.db.commit()
+        await self.db.refresh(db_usuario)
+        await invalidate_usuario(db_usuario.id, db_usuario.email)
         return db_usuario
 
-    def get_by_id(self, usuario_id: int) -> models.Usuario:
-        usuario = self.db.query(models.Usuario).filter(
-            models.Usuario.id == usuario_id,
-            models.Usuario.activo == True
-        ).first()
+    async def get_by_id(self, usuario_id: int) -> schemas.UsuarioCache:
+        cached = await usuarios_cache.get(f"id:{usuario_id}")
+        if cached is not None:
+            return schemas.UsuarioCache.model_validate(cached)
+
+        usuario = await self.db.scalar(
+            select(models.Usuario).where(
+                models.Usuario.id == usuario_id,
+                models.Usuario.activo == True
+            )
+        )
         if not usuario:
             raise NotFoundError("Usuario no encontrado")
-        return usuario
+        return await cache_usuario(usuario)
 
-    def get_by_email(self, email: str) -> Optional[models.Usuario]:
-        return self.db.query(models.Usuario).filter(
-            models.Usuario.email == email,
-            models.Usuario.activo == True
-        ).first()
+    async def get_by_email(self, email: str) -> Optional[schemas.UsuarioCache]:
+        cached = await usuarios_cache.get(f"email:{email}")
+        if cached is not None:
+            return schemas.UsuarioCache.model_validate(cached)
+
+        usuario = await self.db.scalar(
+            select(models.Usuario).where(
+                models.Usuario.email == email,
+                models.Usuario.activo == True
+            )
+        )
+        if not usuario:
+            return None
+        return await cache_usuario(usuario)
+
+    async def login(self, email: str, password: str) -> dict:
+        usuario = await self.get_by_email(email)
 
-    def login(self, email: str, password: str) -> dict:
-        usuario = self.get_by_email(email)
-        
         if not usuario:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Credenciales incorrectas"
             )
-            
-        if not pwd_context.verify(password, usuario.password):
+
+        valid, new_hash = await password_hasher.verify_and_update(password, usuario.password)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Credenciales incorrectas"
             )
-            
+
         return {
             "id": usuario.id,
             "email": usuario.email,
             "nombre": usuario.nombre,
-            "success": True
-        }
\ No newline at end of file
+            "success": True,
+            # Hash con el coste/esquema actual; se guarda después de responder
+            "new_hash": new_hash,
+            "old_hash": usuario.password
+        }
+
+    async def deactivate(self, usuario_id: int):
+        # Baja lógica en dos UPDATE por conjunto: sin cargar los productos en el ORM
+        ahora = datetime.utcnow()
+        result = await self.db.execute(
+            update(models.Usuario)
+            .where(models.Usuario.id == usuario_id, models.Usuario.activo == True)
+            .values(activo=False, fecha_baja=ahora)
+            .returning(models.Usuario.email)
+        )
+        email = result.scalar()
+        if email is None:
+            raise NotFoundError("Usuario no encontrado")
+
+        await self.db.execute(
+            update(Producto)
+            .where(Producto.usuario_id == usuario_id, Producto.activo == True)
+            .values(activo=False, fecha_baja=ahora)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(resumen.reset_statement(usuario_id))
+        await self.db.commit()
+        await invalidate_usuario(usuario_id, email)
+
+    async def purge_inactive(self, cutoff: datetime, batch_size: int = 1000, pause: float = 0.0) -> int:
+        # Solo usuarios sin productos en la tabla principal (se purgan antes)
+        return await archive_in_batches(
+            self.db,
+            models.Usuario,
+            models.UsuarioArchivo,
+            [
+                models.Usuario.activo == False,
+                models.Usuario.fecha_baja < cutoff,
+                ~exists().where(Producto.usuario_id == models.Usuario.id),
+            ],
+            batch_size=batch_size,
+            pause=pause
+        )
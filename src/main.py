@@ -1,18 +1,93 @@
-from fastapi import FastAPI
-from src.shared.database import Base, engine
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from src.shared.database import async_engine, read_replicas
+from src.shared.cache import cache_stats
+from src.shared.compression import CompressionMiddleware
+from src.shared.hashing import password_hasher
+from src.shared.idempotency import IdempotencyMiddleware
+from src.shared.metrics import MetricsMiddleware, render_metrics
+from src.shared.profiling import ProfilingMiddleware
+from src.shared.replicas import ReadAfterWriteMiddleware
+from src.shared.responses import default_response_class
 from src.features.usuarios.router import router as usuarios_router
 from src.features.productos.router import router as productos_router
+from src.features.productos.group_commit import producto_group_commit
 from src.config import settings
 
-# Crear tablas
-Base.metadata.create_all(bind=engine)
+# El esquema se gestiona aparte (`python -m src.manage migrate`): importar la app
+# no abre conexiones, así que puede cargarse una sola vez en el master (--preload)
 
-app = FastAPI(
-    title="Tienda API",
-    description="API para gestión de tienda con usuarios y productos",
-    version="1.0.0"
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Escribir las altas pendientes del group commit antes de cerrar el engine
+    await producto_group_commit.flush()
+    # Detener el pool de procesos de bcrypt del worker
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    await read_replicas.dispose()
 
-# Registrar routers
-app.include_router(usuarios_router, prefix=settings.API_V1_STR)
-app.include_router(productos_router, prefix=settings.API_V1_STR)
+
+async def get_metrics():
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
+
+async def get_cache_stats():
+    return cache_stats()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="Tienda API",
+        description="API para gestión de tienda con usuarios y productos",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=default_response_class()
+    )
+
+    # Por dentro de la compresión: se guarda el cuerpo sin comprimir y cada
+    # repetición se comprime según su propio Accept-Encoding
+    if settings.IDEMPOTENCY_ENABLED:
+        app.add_middleware(
+            IdempotencyMiddleware,
+            paths=[settings.API_V1_STR + path for path in settings.IDEMPOTENCY_PATHS],
+            ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+            cache_size=settings.IDEMPOTENCY_CACHE_MAX_KEYS,
+            wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+            lease_seconds=settings.IDEMPOTENCY_LEASE_SECONDS,
+            # Mismo límite que la dependencia de la ruta, pero antes de reclamar la clave
+            rate_limits={settings.API_V1_STR + "/usuarios/": "usuarios_create"}
+        )
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    if read_replicas:
+        app.add_middleware(ReadAfterWriteMiddleware, seconds=settings.READ_AFTER_WRITE_SECONDS)
+    # Siempre activo: además del perfilado fija la ruta del registro de consultas lentas
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        interval=settings.PROFILING_INTERVAL_MS / 1000,
+        directory=settings.PROFILING_DIR,
+        max_bytes=settings.PROFILING_MAX_BYTES,
+        backups=settings.PROFILING_BACKUPS
+    )
+    # Se registra el último para quedar por fuera y medir también la compresión
+    app.add_middleware(MetricsMiddleware)
+
+    # Registrar routers
+    app.include_router(usuarios_router, prefix=settings.API_V1_STR)
+    app.include_router(productos_router, prefix=settings.API_V1_STR)
+
+    app.add_api_route("/metrics", get_metrics, methods=["GET"], tags=["monitoring"], include_in_schema=False)
+    app.add_api_route("/cache/stats", get_cache_stats, methods=["GET"], tags=["monitoring"])
+    return app
+
+
+app = create_app()
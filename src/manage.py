@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import os
+import sys
+
+# Comandos de mantenimiento de un solo uso, fuera del arranque de los workers:
+#   python -m src.manage migrate        aplica las migraciones de Alembic
+#   python -m src.manage create-schema  crea las tablas sin Alembic (desarrollo)
+#   python -m src.manage purge          archiva las bajas antiguas y borra las claves de
+#                                       idempotencia caducadas (para cron, p. ej. diario)
+#   python -m src.manage recompute-resumen  recalcula resumen_usuarios desde productos
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def migrate(args):
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    command.upgrade(config, args.revision)
+
+
+def create_schema(args):
+    from src.shared.database import Base, engine
+    # Registrar los modelos en el metadata
+    from src.features.usuarios import models as usuarios_models  # noqa: F401
+    from src.features.productos import models as productos_models  # noqa: F401
+    from src.shared import idempotency  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+
+async def _purge(days: int, batch_size: int, pause: float, idempotency_ttl: int):
+    from datetime import datetime, timedelta
+    from src.shared.database import AsyncSessionLocal, async_engine
+    from src.shared.idempotency import purge_expired
+    from src.features.usuarios.service import AsyncUsuarioService
+    from src.features.productos.service import AsyncProductoService
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    try:
+        async with AsyncSessionLocal() as db:
+            # Primero los productos: un usuario solo se archiva cuando no le quedan
+            productos = await AsyncProductoService(db).purge_inactive(cutoff, batch_size, pause)
+            usuarios = await AsyncUsuarioService(db).purge_inactive(cutoff, batch_size, pause)
+            claves = await purge_expired(db, idempotency_ttl)
+    finally:
+        await async_engine.dispose()
+    print(f"Archivados {productos} productos y {usuarios} usuarios dados de baja antes de {cutoff:%Y-%m-%d}")
+    print(f"Borradas {claves} claves de idempotencia caducadas")
+
+
+def purge(args):
+    from src.config import settings
+    asyncio.run(_purge(
+        settings.PURGE_AFTER_DAYS if args.days is None else args.days,
+        settings.PURGE_BATCH_SIZE if args.batch_size is None else args.batch_size,
+        settings.PURGE_BATCH_PAUSE,
+        settings.IDEMPOTENCY_TTL_SECONDS
+    ))
+
+
+async def _recompute_resumen(usuario_id):
+    from src.shared.database import AsyncSessionLocal, async_engine
+    from src.features.usuarios import models as usuarios_models  # noqa: F401
+    from src.features.productos import resumen
+
+    try:
+        async with AsyncSessionLocal() as db:
+            vendedores = await resumen.recompute(db, usuario_id)
+    finally:
+        await async_engine.dispose()
+    print(f"Recalculado el resumen de {vendedores} vendedores")
+
+
+def recompute_resumen(args):
+    asyncio.run(_recompute_resumen(args.usuario_id))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.manage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_migrate = subparsers.add_parser("migrate", help="Aplicar migraciones pendientes")
+    parser_migrate.add_argument("revision", nargs="?", default="head")
+    parser_migrate.set_defaults(func=migrate)
+
+    parser_schema = subparsers.add_parser("create-schema", help="Crear las tablas sin Alembic")
+    parser_schema.set_defaults(func=create_schema)
+
+    parser_purge = subparsers.add_parser("purge", help="Archivar las bajas antiguas por lotes")
+    parser_purge.add_argument("--days", type=int, help="Antigüedad mínima de la baja (PURGE_AFTER_DAYS)")
+    parser_purge.add_argument("--batch-size", type=int, help="Filas por lote (PURGE_BATCH_SIZE)")
+    parser_purge.set_defaults(func=purge)
+
+    parser_resumen = subparsers.add_parser(
+        "recompute-resumen", help="Recalcular los agregados por vendedor desde productos"
+    )
+    parser_resumen.add_argument("--usuario-id", type=int, help="Solo este vendedor")
+    parser_resumen.set_defaults(func=recompute_resumen)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
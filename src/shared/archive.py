@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime
+from sqlalchemy import DateTime, delete, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Mueve a la tabla de archivo las filas que cumplen `conditions`, en lotes con su propio
+# commit para no retener el bloqueo de escritura durante toda la purga
+async def archive_in_batches(
+    db: AsyncSession,
+    model,
+    archive_model,
+    conditions: list,
+    batch_size: int = 1000,
+    pause: float = 0.0
+) -> int:
+    columns = [column.name for column in archive_model.__table__.columns if column.name != "fecha_archivo"]
+    source = model.__table__.c
+    archived = 0
+    while True:
+        ids = (await db.scalars(
+            select(model.id).where(*conditions).order_by(model.fecha_baja).limit(batch_size)
+        )).all()
+        if not ids:
+            return archived
+
+        await db.execute(
+            insert(archive_model).from_select(
+                columns + ["fecha_archivo"],
+                select(*(source[name] for name in columns), literal(datetime.utcnow(), DateTime))
+                .where(model.id.in_(ids))
+            )
+        )
+        await db.execute(delete(model).where(model.id.in_(ids)))
+        await db.commit()
+        archived += len(ids)
+        if pause:
+            await asyncio.sleep(pause)
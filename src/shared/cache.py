@@ -0,0 +1,120 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from src.config import settings
+from src.shared.metrics import CACHE_REQUESTS
+
+# Caché con interfaz asíncrona para que el backend compartido (Redis) y el local
+# en memoria sean intercambiables. Los valores deben ser serializables a JSON.
+class BaseCache:
+    def __init__(self, name: str, ttl: int):
+        self.name = name
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+            CACHE_REQUESTS.labels(self.name, "miss").inc()
+        else:
+            self.hits += 1
+            CACHE_REQUESTS.labels(self.name, "hit").inc()
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        await self._set(key, value, ttl or self.ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._delete(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    async def _get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def _set(self, key: str, value: Any, ttl: int):
+        raise NotImplementedError
+
+    async def _delete(self, keys):
+        raise NotImplementedError
+
+
+# TTL + LRU acotado en memoria, local a cada worker
+class MemoryCache(BaseCache):
+    def __init__(self, name: str, ttl: int, max_size: int):
+        super().__init__(name, ttl)
+        self.max_size = max_size
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def _get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def _set(self, key: str, value: Any, ttl: int):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    async def _delete(self, keys):
+        for key in keys:
+            self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "size": len(self._data), "max_size": self.max_size}
+
+
+# Backend compartido entre workers; requiere el paquete opcional `redis`
+class RedisCache(BaseCache):
+    def __init__(self, name: str, ttl: int, url: str):
+        super().__init__(name, ttl)
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_URL requiere el paquete 'redis' instalado")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = f"{name}:"
+
+    async def _get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def _set(self, key: str, value: Any, ttl: int):
+        await self._client.set(self._prefix + key, json.dumps(value, default=str), ex=ttl)
+
+    async def _delete(self, keys):
+        await self._client.delete(*(self._prefix + key for key in keys))
+
+
+_caches: List[BaseCache] = []
+
+# local=True fuerza la caché en memoria aunque haya CACHE_URL
+def build_cache(name: str, ttl: int, max_size: int, local: bool = False) -> BaseCache:
+    if settings.CACHE_URL and not local:
+        cache = RedisCache(name, ttl, settings.CACHE_URL)
+    else:
+        cache = MemoryCache(name, ttl, max_size)
+    _caches.append(cache)
+    return cache
+
+def cache_stats() -> List[Dict[str, Any]]:
+    return [cache.stats() for cache in _caches]
@@ -0,0 +1,132 @@
+import zlib
+from typing import Callable, Optional
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+# Tipos que merece la pena comprimir; imágenes, zip, etc. ya van comprimidos
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/xml")
+COMPRESSIBLE_SUFFIXES = ("+json", "+xml")
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+# Elige la codificación según Accept-Encoding; br tiene preferencia si está disponible
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+# Devuelve compress(data, final); en los fragmentos intermedios se vacía el buffer
+# para que cada trozo de un streaming llegue al cliente sin esperar al final
+def make_compressor(encoding: str, gzip_level: int, brotli_quality: int) -> Callable[[bytes, bool], bytes]:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=brotli_quality)
+
+        def compress(data: bytes, final: bool) -> bytes:
+            return compressor.process(data) + (compressor.finish() if final else compressor.flush())
+    else:
+        # wbits=31: formato gzip (cabecera y CRC) en lugar de zlib
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+        def compress(data: bytes, final: bool) -> bytes:
+            return compressor.compress(data) + compressor.flush(
+                zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+            )
+    return compress
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compress = None  # None: sin decidir; False: se envía tal cual
+
+        async def send_wrapper(message):
+            nonlocal start_message, compress
+            if message["type"] == "http.response.start":
+                # Se retiene hasta ver el primer fragmento del cuerpo
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                await send(message)
+                return
+
+            if compress is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                compressible = (
+                    "content-encoding" not in headers
+                    and _is_compressible(headers.get("content-type", ""))
+                )
+                if compressible:
+                    headers.add_vary_header("Accept-Encoding")
+                # Un cuerpo completo pequeño no compensa; en streaming no se conoce el tamaño
+                if not compressible or (not more_body and len(body) < self.minimum_size):
+                    compress = False
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compress = make_compressor(encoding, self.gzip_level, self.brotli_quality)
+                data = compress(body, not more_body)
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(data))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            if compress is False:
+                await send(message)
+                return
+            more_body = message.get("more_body", False)
+            await send({
+                "type": "http.response.body",
+                "body": compress(message.get("body", b""), not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
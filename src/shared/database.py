@@ -1,18 +1,142 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.config import settings
+from src.shared.metrics import instrument_engine
+from src.shared.profiling import instrument_slow_queries
+from src.shared.replicas import ReplicaSet, reads_from_primary
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Solo para SQLite
-)
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _is_sqlite_memory(url: str) -> bool:
+    return _is_sqlite(url) and make_url(url).database in (None, "", ":memory:")
+
+def _connect_args(url: str) -> dict:
+    if _is_sqlite(url):
+        return {"check_same_thread": False}  # Solo para SQLite
+    return {}
+
+def _async_url(url: str) -> str:
+    # Driver asíncrono según DATABASE_URL: aiosqlite en local, asyncpg para Postgres
+    url_obj = make_url(url)
+    backend = url_obj.get_backend_name()
+    if backend == "sqlite":
+        url_obj = url_obj.set(drivername="sqlite+aiosqlite")
+    elif backend == "postgresql":
+        url_obj = url_obj.set(drivername="postgresql+asyncpg")
+    return url_obj.render_as_string(hide_password=False)
+
+def _engine_options(url: str, is_async: bool = False) -> dict:
+    options = {
+        "connect_args": _connect_args(url),
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    # SQLite en memoria usa un pool de una sola conexión, sin tamaño configurable
+    if not _is_sqlite_memory(url):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+        # aiosqlite usa NullPool por defecto: una conexión nueva (y sus PRAGMA) por sesión
+        if is_async and _is_sqlite(url):
+            options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
+def sqlite_pragmas() -> list:
+    pragmas = []
+    if settings.SQLITE_WAL:
+        # WAL: los lectores no se bloquean detrás de los escritores
+        pragmas.append("PRAGMA journal_mode=WAL")
+    pragmas += [
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+    ]
+    return pragmas
+
+def apply_sqlite_pragmas(engine: Engine, extra: tuple = ()):
+    pragmas = sqlite_pragmas() + list(extra)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+instrument_engine(engine, "sync")
+instrument_slow_queries(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(
+    _async_url(settings.DATABASE_URL),
+    **_engine_options(settings.DATABASE_URL, is_async=True)
+)
+instrument_engine(async_engine.sync_engine, "async")
+instrument_slow_queries(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+if _is_sqlite(settings.DATABASE_URL):
+    apply_sqlite_pragmas(engine)
+    apply_sqlite_pragmas(async_engine.sync_engine)
+
+def _replica_engine(url: str, index: int):
+    replica = create_async_engine(_async_url(url), **_engine_options(url, is_async=True))
+    instrument_engine(replica.sync_engine, f"replica{index}")
+    instrument_slow_queries(replica.sync_engine, f"replica{index}")
+    if _is_sqlite(url):
+        # Una réplica solo admite lecturas
+        apply_sqlite_pragmas(replica.sync_engine, extra=("PRAGMA query_only=ON",))
+    return replica
+
+read_replicas = ReplicaSet(
+    [_replica_engine(url, index) for index, url in enumerate(settings.DATABASE_REPLICA_URLS)],
+    health_interval=settings.DB_REPLICA_HEALTH_INTERVAL,
+    health_timeout=settings.DB_REPLICA_HEALTH_TIMEOUT
+)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Lecturas sin escritura posterior: réplica sana en round-robin, o el primario si no hay
+# réplicas, ninguna responde o el cliente acaba de escribir (read-after-write)
+async def get_read_db(request: Request):
+    sessionmaker = None
+    if read_replicas and not reads_from_primary(request.cookies):
+        sessionmaker = await read_replicas.pick()
+    if sessionmaker is None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    async with sessionmaker() as db:
+        try:
+            yield db
+        except OperationalError:
+            read_replicas.mark_down(sessionmaker)
+            raise
@@ -12,3 +12,31 @@ class BadRequestError(HTTPException):
 class UnauthorizedError(HTTPException):
     def __init__(self, detail: str = "No autorizado"):
         super().__init__(status_code=401, detail=detail)
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, detail: str = "Servicio no disponible", retry_after: int = 1):
+        super().__init__(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+class UnsupportedMediaTypeError(HTTPException):
+    def __init__(self, detail: str = "Tipo de contenido no soportado"):
+        super().__init__(status_code=415, detail=detail)
+
+class ConflictError(HTTPException):
+    def __init__(self, detail: Any):
+        super().__init__(status_code=409, detail=detail)
+
+class ForbiddenError(HTTPException):
+    def __init__(self, detail: str = "Operación no permitida"):
+        super().__init__(status_code=403, detail=detail)
+
+class TooManyRequestsError(HTTPException):
+    def __init__(self, detail: str = "Demasiadas peticiones, intente más tarde", retry_after: int = 1):
+        super().__init__(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
@@ -0,0 +1,73 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import time
+from typing import Optional, Tuple
+from src.config import settings
+from src.shared.exceptions import ServiceUnavailableError
+from src.shared.metrics import PASSWORD_HASH_DURATION
+from src.shared.passwords import hash_password, verify_and_update_password, verify_password
+
+
+# Ejecuta bcrypt en un pool de procesos con una cola acotada
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int, retry_after: int):
+        self.workers = workers
+        self.max_pending = workers + max_queue
+        self.retry_after = retry_after
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Se crea en el primer uso para que cada worker de gunicorn tenga su propio pool
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _submit(self, operation: str, fn, *args):
+        if self._pending >= self.max_pending:
+            raise ServiceUnavailableError(
+                "Servicio ocupado, intente más tarde",
+                retry_after=self.retry_after
+            )
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            PASSWORD_HASH_DURATION.labels(operation).observe(time.perf_counter() - start)
+            return result
+        except BrokenProcessPool:
+            self.shutdown()
+            raise ServiceUnavailableError(
+                "Servicio ocupado, intente más tarde",
+                retry_after=self.retry_after
+            )
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit("verify", verify_password, password, hashed)
+
+    # Devuelve (válida, nuevo hash) si el hash usa un esquema o coste desactualizado
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._submit("verify", verify_and_update_password, password, hashed)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER
+)
@@ -0,0 +1,290 @@
+import asyncio
+import hmac
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, Text, and_, delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from src.config import settings
+from src.shared.cache import build_cache
+from src.shared.database import AsyncSessionLocal, Base
+from src.shared.exceptions import TooManyRequestsError
+from src.shared.rate_limit import CHECKED_SCOPE_KEY, check_rate_limit
+
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+
+# Primera respuesta de cada (ruta, Idempotency-Key). status_code NULL: la petición
+# original sigue en curso y sus duplicados esperan a que termine
+class ClaveIdempotencia(Base):
+    __tablename__ = "claves_idempotencia"
+
+    ruta = Column(String(200), primary_key=True)
+    clave = Column(String(MAX_KEY_LENGTH), primary_key=True)
+    huella = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    headers = Column(Text)
+    body = Column(LargeBinary)
+    fecha_creacion = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+def _fingerprint(body: bytes) -> str:
+    # HMAC con el secreto del servidor: el cuerpo de POST /usuarios/ lleva la contraseña
+    # en claro y un hash sin clave de la tabla permitiría probar contraseñas a su velocidad
+    return hmac.new(settings.JWT_SECRET_KEY.encode(), body, "sha256").hexdigest()
+
+
+def _stored(fila: ClaveIdempotencia) -> dict:
+    return {
+        "huella": fila.huella,
+        "status": fila.status_code,
+        "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(fila.headers)],
+        "body": fila.body,
+    }
+
+
+async def _json_body(body: bytes):
+    return json.loads(body)
+
+
+def _error(status_code: int, detail: str) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+# Borra las claves caducadas; lo llama `python -m src.manage purge`
+async def purge_expired(db: AsyncSession, ttl: int) -> int:
+    result = await db.execute(
+        delete(ClaveIdempotencia)
+        .where(ClaveIdempotencia.fecha_creacion < datetime.utcnow() - timedelta(seconds=ttl))
+    )
+    await db.commit()
+    return result.rowcount
+
+
+# Idempotency-Key en los POST de `paths`. La primera petición se ejecuta y su respuesta
+# (salvo 5xx y 429) se guarda en la base y en una caché LRU local con TTL; los reintentos
+# la reciben sin pasar por la aplicación. Los duplicados concurrentes esperan al
+# original: en el mismo worker con un Future, entre workers consultando la fila. Si el
+# original no responde en lease_seconds (su worker murió) un reintento ocupa su lugar.
+# `rate_limits` (ruta -> nombre en RATE_LIMITS) aplica el límite antes de reclamar la
+# clave: un 429 no debe costar escrituras en claves_idempotencia
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app,
+        paths: Iterable[str],
+        ttl: int = 86400,
+        cache_size: int = 10000,
+        wait_seconds: float = 10.0,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 0.05,
+        rate_limits: Optional[Dict[str, str]] = None
+    ):
+        self.app = app
+        self.paths = set(paths)
+        self.rate_limits = rate_limits or {}
+        self.ttl = ttl
+        self.wait_seconds = wait_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.cache = build_cache("idempotencia", ttl, cache_size, local=True)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        clave = Headers(scope=scope).get(HEADER)
+        if clave is None:
+            await self.app(scope, receive, send)
+            return
+        if not clave or len(clave) > MAX_KEY_LENGTH:
+            await _error(400, f"Idempotency-Key debe tener entre 1 y {MAX_KEY_LENGTH} caracteres")(scope, receive, send)
+            return
+
+        # El cuerpo se lee entero para la huella y se entrega después a la aplicación
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        ruta = f"POST {scope['path']}"
+        huella = _fingerprint(body)
+        key = f"{ruta} {clave}"
+
+        while True:
+            guardada = await self.cache.get(key)
+            future = self._in_flight.get(key)
+            if guardada is not None or future is None:
+                break
+            # Duplicado concurrente en este worker: espera al original
+            guardada = await asyncio.shield(future)
+            if guardada is not None:
+                break
+
+        if guardada is None:
+            limite = self.rate_limits.get(scope["path"])
+            if limite is not None:
+                client = scope.get("client")
+                try:
+                    await check_rate_limit(limite, client[0] if client else None, lambda: _json_body(body))
+                except TooManyRequestsError as exc:
+                    await JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)(
+                        scope, receive, send
+                    )
+                    return
+                scope.setdefault(CHECKED_SCOPE_KEY, set()).add(limite)
+
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            enviada = False
+            try:
+                guardada, enviada = await self._execute(scope, receive, send, ruta, clave, huella, body)
+            finally:
+                del self._in_flight[key]
+                # None: los que esperan lo intentan por su cuenta
+                future.set_result(guardada)
+            if enviada:
+                return
+
+        if guardada["huella"] != huella:
+            await _error(422, "Idempotency-Key ya usada con otro cuerpo")(scope, receive, send)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": guardada["status"],
+            "headers": guardada["headers"] + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": guardada["body"]})
+
+    def _is_stale(self, fila: ClaveIdempotencia) -> bool:
+        # En curso desde hace más de lease_seconds: el worker del original ya no está
+        return fila.status_code is None and (
+            fila.fecha_creacion < datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        )
+
+    async def _claim(self, ruta: str, clave: str, huella: str) -> Optional[ClaveIdempotencia]:
+        # INSERT de la fila en curso: la clave primaria decide quién ejecuta.
+        # Devuelve None si se ha reclamado o la fila existente si no
+        async with AsyncSessionLocal() as db:
+            db.add(ClaveIdempotencia(ruta=ruta, clave=clave, huella=huella))
+            try:
+                await db.commit()
+                return None
+            except IntegrityError:
+                await db.rollback()
+            # Caducada y aún sin purgar, o abandonada por un worker muerto: se reclama con
+            # un UPDATE condicional, así entre varios reintentos solo gana uno
+            now = datetime.utcnow()
+            result = await db.execute(
+                update(ClaveIdempotencia)
+                .where(
+                    ClaveIdempotencia.ruta == ruta,
+                    ClaveIdempotencia.clave == clave,
+                    or_(
+                        ClaveIdempotencia.fecha_creacion < now - timedelta(seconds=self.ttl),
+                        and_(
+                            ClaveIdempotencia.status_code.is_(None),
+                            ClaveIdempotencia.fecha_creacion < now - timedelta(seconds=self.lease_seconds)
+                        )
+                    )
+                )
+                .values(huella=huella, status_code=None, headers=None, body=None, fecha_creacion=now)
+            )
+            await db.commit()
+            if result.rowcount:
+                return None
+            return await db.get(ClaveIdempotencia, (ruta, clave))
+
+    async def _wait_for_original(self, ruta: str, clave: str) -> Optional[ClaveIdempotencia]:
+        # El original se ejecuta en otro worker: se consulta la fila hasta que tenga respuesta
+        # None si el original falló y borró la fila o si su worker murió; con status_code
+        # NULL si se agota la espera
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            async with AsyncSessionLocal() as db:
+                fila = await db.get(ClaveIdempotencia, (ruta, clave))
+            if fila is None or self._is_stale(fila):
+                return None
+            if fila.status_code is not None or time.monotonic() >= deadline:
+                return fila
+
+    async def _execute(self, scope, receive, send, ruta, clave, huella, body):
+        # Devuelve (respuesta guardada o None, si ya se ha respondido al cliente)
+        while True:
+            fila = await self._claim(ruta, clave, huella)
+            if fila is None:
+                break
+            if fila.huella != huella:
+                await _error(422, "Idempotency-Key ya usada con otro cuerpo")(scope, receive, send)
+                return None, True
+            if fila.status_code is None:
+                fila = await self._wait_for_original(ruta, clave)
+                if fila is None:
+                    continue  # el original falló o su worker murió: se reclama de nuevo
+                if fila.status_code is None:
+                    await _error(409, "Petición con esta Idempotency-Key en curso, reintente más tarde")(
+                        scope, receive, send
+                    )
+                    return None, True
+            guardada = _stored(fila)
+            await self.cache.set(f"{ruta} {clave}", guardada)
+            return guardada, False
+
+        body_sent = False
+
+        async def receive_wrapper():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        start = None
+        chunks = []
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            guardada = await self._save(ruta, clave, start, b"".join(chunks))
+        return guardada, True
+
+    async def _save(self, ruta: str, clave: str, start: Optional[dict], body: bytes) -> Optional[dict]:
+        status = start["status"] if start else 500
+        guardada = None
+        async with AsyncSessionLocal() as db:
+            fila = await db.get(ClaveIdempotencia, (ruta, clave))
+            if fila is None:
+                return None
+            if status >= 500 or status == 429:
+                # Sin respuesta reutilizable: un reintento debe ejecutarse de nuevo
+                await db.delete(fila)
+            else:
+                fila.status_code = status
+                fila.headers = json.dumps([
+                    (name.decode("latin-1"), value.decode("latin-1")) for name, value in start["headers"]
+                ])
+                fila.body = body
+                guardada = _stored(fila)
+            await db.commit()
+        if guardada is not None:
+            await self.cache.set(f"{ruta} {clave}", guardada)
+        return guardada
@@ -0,0 +1,146 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Con varios workers de gunicorn, PROMETHEUS_MULTIPROC_DIR debe definirse antes de
+# arrancar (ver start_gunicorn.sh) para que /metrics agregue los valores de todos
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP",
+    ["method", "route", "status"]
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Consultas SQL ejecutadas por petición",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Tiempo total en la base de datos por petición",
+    ["route"]
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duración de cada consulta SQL",
+    ["engine"]
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Espera para obtener una conexión del pool",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Duración de hash/verify de contraseñas, incluida la espera en la cola",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5, 10)
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Lecturas de caché por resultado",
+    ["cache", "result"]
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Peticiones rechazadas con 429 por límite",
+    ["limiter"]
+)
+
+# Contadores de la petición en curso: [consultas, segundos en la base de datos]
+_request_db_stats: ContextVar[Optional[list]] = ContextVar("request_db_stats", default=None)
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        db_stats = [0, 0.0]
+        token = _request_db_stats.set(db_stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db_stats.reset(token)
+            route = route_label(scope)
+            REQUEST_LATENCY.labels(scope["method"], route, str(status_code[0])).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(route).observe(db_stats[0])
+            REQUEST_DB_TIME.labels(route).observe(db_stats[1])
+
+
+def instrument_engine(engine: Engine, name: str):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        DB_QUERY_DURATION.labels(name).observe(elapsed)
+        db_stats = _request_db_stats.get()
+        if db_stats is not None:
+            db_stats[0] += 1
+            db_stats[1] += elapsed
+
+    # dispose() (post_fork de gunicorn con --preload) sustituye el pool por uno nuevo
+    # sin la envoltura: se vuelve a instrumentar
+    @event.listens_for(engine, "engine_disposed")
+    def engine_disposed(engine):
+        _instrument_pool(engine.pool, name)
+
+    _instrument_pool(engine.pool, name)
+
+
+def _instrument_pool(pool, name: str):
+    # El pool no tiene un evento previo al checkout: se mide envolviendo _do_get
+    do_get = pool._do_get
+
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_WAIT.labels(name).observe(time.perf_counter() - start)
+
+    pool._do_get = timed_do_get
+
+
+def render_metrics():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,30 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+from src.config import settings
+
+# Módulo ligero que importan los procesos del pool de bcrypt: no depende de FastAPI
+# y passlib solo se carga en el primer hash
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=settings.PASSWORD_SCHEMES,
+        deprecated="auto",
+        bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+    )
+
+
+def hash_password(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return get_pwd_context().verify(password, hashed)
+
+
+def verify_and_update_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return get_pwd_context().verify_and_update(password, hashed)
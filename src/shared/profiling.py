@@ -0,0 +1,206 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from src.config import settings
+from src.shared.metrics import route_label
+
+PROFILE_HEADER = "x-profile"
+
+# Scope ASGI de la petición en curso: el router añade la ruta al mismo dict, así que
+# al registrar una consulta lenta ya se conoce la plantilla de la ruta
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+def current_route() -> str:
+    scope = _request_scope.get()
+    if scope is None:
+        return "-"  # fuera de una petición: manage, tareas de fondo
+    return f"{scope['method']} {route_label(scope)}"
+
+
+# Muestreo de pilas en un hilo aparte mientras haya peticiones perfiladas. Cada muestra
+# se asigna a la petición cuyo frame (el del middleware) está en la pila del bucle de
+# eventos: con peticiones concurrentes intercaladas, cada una solo cuenta su propio
+# código, y el tiempo en espera de E/S no aparece
+class StackSampler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active: Dict[int, tuple] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, anchor) -> Counter:
+        stacks = Counter()
+        with self._lock:
+            self._active[id(anchor)] = (threading.get_ident(), anchor, stacks)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        return stacks
+
+    def stop(self, anchor):
+        with self._lock:
+            self._active.pop(id(anchor), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            # Todo con el lock: cuando stop() vuelve nadie más escribe en el Counter de la
+            # petición, que se vuelca después en otro hilo
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for thread_id, anchor, stacks in self._active.values():
+                    frame = frames.get(thread_id)
+                    names = []
+                    while frame is not None and frame is not anchor:
+                        code = frame.f_code
+                        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    if frame is anchor:
+                        stacks[";".join(reversed(names)) or "middleware"] += 1
+
+
+def _profile_path(directory: str, route: str) -> str:
+    # Un fichero por proceso, como el registro de consultas lentas: varios workers rotando
+    # el mismo fichero se pisan. flamegraph.pl acepta varios: cat RUTA-*.folded
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", route).strip("_")
+    return os.path.join(directory, f"{name}-{os.getpid()}.folded")
+
+
+_write_lock = threading.Lock()
+
+
+def _write_profile(path: str, stacks: Counter, max_bytes: int, backups: int):
+    # Formato de pilas colapsadas ("a;b;c N"): flamegraph.pl o speedscope suman las líneas.
+    # Al pasar de max_bytes se rota como RotatingFileHandler: RUTA.folded.1 ... .N
+    with _write_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if max_bytes > 0 and os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+            for i in range(backups - 1, 0, -1):
+                if os.path.exists(f"{path}.{i}"):
+                    os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+            if backups > 0:
+                os.replace(path, f"{path}.1")
+            else:
+                os.remove(path)
+        with open(path, "a") as f:
+            f.write("".join(f"{stack} {count}\n" for stack, count in stacks.items()))
+
+
+# Perfila una petición si trae X-Profile con el token de administración o si cae en la
+# fracción `sample_rate`. Además fija el contexto de ruta del registro de consultas lentas
+class ProfilingMiddleware:
+    def __init__(self, app, token: Optional[str] = None, sample_rate: float = 0.0,
+                 interval: float = 0.005, directory: str = "logs/profiles",
+                 max_bytes: int = 10 * 1024 * 1024, backups: int = 5):
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.sampler = StackSampler(interval)
+
+    def _should_profile(self, scope) -> bool:
+        if self.token:
+            header = Headers(scope=scope).get(PROFILE_HEADER)
+            # En bytes: compare_digest no admite str con caracteres no ASCII
+            if header is not None and hmac.compare_digest(header.encode("latin-1"), self.token.encode()):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_scope.set(scope)
+        try:
+            if not self._should_profile(scope):
+                await self.app(scope, receive, send)
+                return
+            anchor = sys._getframe()
+            stacks = self.sampler.start(anchor)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.sampler.stop(anchor)
+                if stacks:
+                    path = _profile_path(self.directory, current_route())
+                    await asyncio.to_thread(_write_profile, path, stacks, self.max_bytes, self.backups)
+        finally:
+            _request_scope.reset(token)
+
+
+# Registro de consultas lentas: un fichero rotado por proceso, porque varios workers
+# rotando el mismo fichero se pisan. Se abre en el primer uso, ya en el worker
+@lru_cache(maxsize=None)
+def _slow_query_logger(pid: int) -> logging.Logger:
+    logger = logging.getLogger("tienda.slow_queries")
+    logger.propagate = False
+    for handler in list(logger.handlers):  # heredado del master con --preload
+        logger.removeHandler(handler)
+    os.makedirs(settings.SLOW_QUERY_LOG_DIR, exist_ok=True)
+    handler = RotatingFileHandler(
+        os.path.join(settings.SLOW_QUERY_LOG_DIR, f"slow_queries-{pid}.log"),
+        maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+        delay=True
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def _parameters_shape(parameters, executemany: bool) -> str:
+    # Solo tipos y número de filas: los valores (emails, hashes) no se registran
+    if executemany and parameters:
+        return f"{len(parameters)} x {_parameters_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def instrument_slow_queries(engine: Engine, name: str):
+    threshold = settings.SLOW_QUERY_MS / 1000
+    if threshold <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["slow_query_start"].pop()
+        if elapsed < threshold:
+            return
+        _slow_query_logger(os.getpid()).info(json.dumps({
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_ms": round(elapsed * 1000, 2),
+            "engine": name,
+            "route": current_route(),
+            "parameters": _parameters_shape(parameters, executemany),
+            "sql": " ".join(statement.split())[:settings.SLOW_QUERY_MAX_SQL],
+        }, ensure_ascii=False))
@@ -0,0 +1,160 @@
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from fastapi import Request
+from src.config import settings
+from src.shared.exceptions import TooManyRequestsError
+from src.shared.metrics import RATE_LIMIT_REJECTIONS
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+# "5/minute" -> (capacidad 5, 5/60 fichas por segundo)
+def parse_limit(spec: str) -> Tuple[int, float]:
+    count, _, period = spec.partition("/")
+    seconds = PERIODS.get(period.strip(), None) or float(period)
+    capacity = int(count)
+    return capacity, capacity / seconds
+
+
+# Token bucket: cada clave admite ráfagas de `capacity` y se recarga a `rate` por segundo.
+# hit() devuelve 0 si se admite o los segundos hasta la siguiente ficha
+class BaseRateLimiter:
+    def __init__(self, name: str, capacity: int, rate: float):
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+
+    async def hit(self, key: str) -> float:
+        raise NotImplementedError
+
+
+# Un par (fichas, última actualización) por clave en un OrderedDict acotado: al llenarse
+# se descarta la clave usada hace más tiempo, que equivale a un bucket lleno
+class MemoryRateLimiter(BaseRateLimiter):
+    def __init__(self, name: str, capacity: int, rate: float, max_keys: int):
+        super().__init__(name, capacity, rate)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def hit(self, key: str) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Recarga y consumo atómicos en Redis; la clave caduca cuando el bucket estaría lleno
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+# Límite compartido entre workers; requiere el paquete opcional `redis`
+class RedisRateLimiter(BaseRateLimiter):
+    def __init__(self, name: str, capacity: int, rate: float, url: str):
+        super().__init__(name, capacity, rate)
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_URL requiere el paquete 'redis' instalado")
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_LUA)
+        self._prefix = f"limite:{name}:"
+
+    async def hit(self, key: str) -> float:
+        wait = await self._script(
+            keys=[self._prefix + key],
+            args=[self.capacity, self.rate, time.time()]
+        )
+        return float(wait)
+
+
+def build_rate_limiter(name: str, spec: str) -> BaseRateLimiter:
+    capacity, rate = parse_limit(spec)
+    url = settings.RATE_LIMIT_URL or settings.CACHE_URL
+    if url:
+        return RedisRateLimiter(name, capacity, rate, url)
+    return MemoryRateLimiter(name, capacity, rate, settings.RATE_LIMIT_MAX_KEYS)
+
+
+async def _check(limiter: BaseRateLimiter, key: str):
+    wait = await limiter.hit(key)
+    if wait > 0:
+        RATE_LIMIT_REJECTIONS.labels(limiter.name).inc()
+        raise TooManyRequestsError(retry_after=max(1, math.ceil(wait)))
+
+
+def _email_from_body(body) -> Optional[str]:
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+@lru_cache(maxsize=None)
+def _route_limiters(route: str) -> Tuple[Optional[BaseRateLimiter], Optional[BaseRateLimiter]]:
+    # Unos limitadores por ruta, compartidos por la dependencia y el middleware de idempotencia
+    limits = settings.RATE_LIMITS.get(route, {})
+    ip_limiter = build_rate_limiter(f"{route}:ip", limits["ip"]) if "ip" in limits else None
+    email_limiter = build_rate_limiter(f"{route}:email", limits["email"]) if "email" in limits else None
+    return ip_limiter, email_limiter
+
+
+# Lanza TooManyRequestsError si la petición supera alguno de los límites de `route`.
+# read_body solo se llama si hay límite por email
+async def check_rate_limit(route: str, client_host: Optional[str], read_body: Callable[[], Awaitable[Any]]):
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    ip_limiter, email_limiter = _route_limiters(route)
+    if ip_limiter is not None:
+        await _check(ip_limiter, client_host or "desconocido")
+    if email_limiter is not None:
+        try:
+            email = _email_from_body(await read_body())
+        except ValueError:
+            email = None
+        if email:
+            await _check(email_limiter, email)
+
+
+# Rutas ya limitadas en esta petición por un middleware (idempotencia): la dependencia
+# no vuelve a gastar fichas
+CHECKED_SCOPE_KEY = "rate_limit_checked"
+
+
+# Dependencia para `dependencies=[...]` de la ruta: se resuelve antes que la sesión
+# de base de datos y que el cuerpo del endpoint, así que un 429 no cuesta ni SQL ni bcrypt
+def rate_limit(route: str):
+    _route_limiters(route)
+
+    async def check_rate_limit_dependency(request: Request):
+        if route in request.scope.get(CHECKED_SCOPE_KEY, ()):
+            return
+        # FastAPI ya ha leído el cuerpo: request.json() devuelve el valor en caché
+        await check_rate_limit(route, request.client.host if request.client else None, request.json)
+
+    return check_rate_limit_dependency
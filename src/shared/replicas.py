@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from starlette.datastructures import MutableHeaders
+
+# Cookie que fija las lecturas del cliente al primario tras una escritura suya
+PRIMARY_COOKIE = "tienda_primario"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+# Réplicas de lectura en round-robin; una réplica caída se salta hasta que
+# vuelve a responder a la comprobación periódica
+class ReplicaSet:
+    def __init__(self, engines: List[AsyncEngine], health_interval: float, health_timeout: float):
+        self.engines = engines
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.sessionmakers = [
+            async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+            for engine in engines
+        ]
+        self._healthy = [True] * len(engines)
+        self._checked_at = [0.0] * len(engines)
+        self._next = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    async def _ping(self, index: int):
+        async with self.engines[index].connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _is_healthy(self, index: int) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at[index] < self.health_interval:
+            return self._healthy[index]
+        # Se marca antes de esperar para que las peticiones concurrentes no repitan la comprobación
+        self._checked_at[index] = now
+        try:
+            await asyncio.wait_for(self._ping(index), self.health_timeout)
+            self._healthy[index] = True
+        except Exception:
+            self._healthy[index] = False
+        return self._healthy[index]
+
+    async def pick(self) -> Optional[async_sessionmaker]:
+        # None si no queda ninguna réplica sana: la lectura va al primario
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if await self._is_healthy(index):
+                return self.sessionmakers[index]
+        return None
+
+    def mark_down(self, sessionmaker: async_sessionmaker):
+        index = self.sessionmakers.index(sessionmaker)
+        self._healthy[index] = False
+        self._checked_at[index] = time.monotonic()
+
+    async def dispose(self):
+        for engine in self.engines:
+            await engine.dispose()
+
+
+def reads_from_primary(cookies: dict) -> bool:
+    try:
+        return float(cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+# Marca con una cookie de vida corta las respuestas correctas a peticiones de escritura
+class ReadAfterWriteMiddleware:
+    def __init__(self, app, seconds: int):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(raw=message["headers"])
+                until = int(time.time()) + self.seconds
+                headers.append(
+                    "Set-Cookie",
+                    f"{PRIMARY_COOKIE}={until}; Max-Age={self.seconds}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
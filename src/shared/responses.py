@@ -0,0 +1,66 @@
+from functools import lru_cache
+import hashlib
+from typing import Any, Mapping, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import TypeAdapter
+from src.config import settings
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa el JSONResponse estándar
+    orjson = None
+
+
+def default_response_class():
+    if settings.ORJSON_RESPONSES and orjson is not None:
+        return ORJSONResponse
+    return JSONResponse
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+# Valida una sola vez (desde atributos ORM) y serializa en Rust con dump_json,
+# sin pasar por jsonable_encoder ni por la validación de response_model de FastAPI
+def pydantic_response(
+    schema: Any,
+    data: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    adapter = _adapter(schema)
+    value = adapter.validate_python(data, from_attributes=True)
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
+
+
+# ETag débil a partir de la versión de las filas (no del cuerpo serializado)
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": settings.HTTP_CACHE_CONTROL}
+
+
+# Comparación débil de If-None-Match (RFC 9110): se ignora el prefijo W/
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -2,12 +2,22 @@
 
 mkdir -p logs
 
-# Ejecutar Gunicorn como daemon
+# Métricas de Prometheus compartidas entre los workers
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-$(pwd)/.prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# Aplicar migraciones pendientes antes de levantar los workers
+python -m src.manage migrate || exit 1
+
+# Ejecutar Gunicorn como daemon; --preload importa la app una vez en el master
 gunicorn \
+    --config gunicorn.conf.py \
     --bind 0.0.0.0:8000 \
     --worker-class uvicorn.workers.UvicornWorker \
     --daemon \
     --workers 4 \
+    --preload \
     --pid gunicorn.pid \
     --access-logfile logs/access.log \
     --error-logfile logs/error.log \